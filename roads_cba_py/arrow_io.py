@@ -0,0 +1,142 @@
+"""
+Parquet (and Arrow) storage of SectionBatch and CbaResultBatch, a column per field. The projections of the results are
+fixed size list columns of the horizon, so a reader that only asks for npv or work_year doesn't decode them. Results
+are written one row group per batch, so the chunks of compute_cba_for_sections can be streamed to a file and read back
+the same way.
+
+pyarrow is not a requirement of the package, the functions here raise an ImportError without it.
+"""
+
+from roads_cba_py.cba_result import CbaResultBatch
+from roads_cba_py.section_batch import SectionBatch, COLUMNS
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+AVAILABLE = pa is not None
+
+
+def require_pyarrow():
+    if not AVAILABLE:
+        raise ImportError("Parquet and Arrow support needs pyarrow, install it with: pip install pyarrow")
+
+
+def arrow_type(column):
+    if column.dtype == object:
+        return pa.string()
+    if column.ndim == 2:
+        return pa.list_(pa.from_numpy_dtype(column.dtype), column.shape[1])
+    return pa.from_numpy_dtype(column.dtype)
+
+
+def to_arrow(column, type_):
+    if column.ndim == 2:
+        values = pa.array(column.ravel(), type=type_.value_type)
+        return pa.FixedSizeListArray.from_arrays(values, column.shape[1])
+    return pa.array(column, type=type_)
+
+
+def from_arrow(array):
+    """
+    A (chunked) Arrow column as the numpy column of a batch, (rows, size) for a fixed size list
+    """
+    if isinstance(array, pa.ChunkedArray):
+        array = array.combine_chunks() if array.num_chunks else pa.array([], type=array.type)
+    if pa.types.is_fixed_size_list(array.type):
+        size = array.type.list_size
+        return array.flatten().to_numpy(zero_copy_only=False).reshape(-1, size)
+    values = array.to_numpy(zero_copy_only=False)
+    return values.astype(object) if pa.types.is_string(array.type) else values
+
+
+def sections_schema():
+    require_pyarrow()
+    return pa.schema([(name, pa.string() if dtype == object else pa.float64()) for name, (dtype, _) in COLUMNS.items()])
+
+
+def sections_to_table(batch: SectionBatch):
+    """
+    The sections as an Arrow table, None (NaN in numeric columns) stored as null
+    """
+    schema = sections_schema()
+    arrays = [pa.array(batch[field.name], type=field.type, from_pandas=True) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def sections_from_table(table) -> SectionBatch:
+    """
+    The sections of an Arrow table, absent fields take the Section defaults
+    """
+    columns = {name: from_arrow(table.column(name)) for name in table.column_names if name in COLUMNS}
+    return SectionBatch(columns, table.num_rows)
+
+
+def write_sections(batch: SectionBatch, path, row_group_size=None):
+    require_pyarrow()
+    pq.write_table(sections_to_table(batch), path, row_group_size=row_group_size)
+
+
+def read_sections(path, columns=None) -> SectionBatch:
+    require_pyarrow()
+    return sections_from_table(pq.read_table(path, columns=columns))
+
+
+def results_schema(results: CbaResultBatch):
+    require_pyarrow()
+    return pa.schema([(name, arrow_type(column)) for name, column in results.columns.items()])
+
+
+def results_to_table(results: CbaResultBatch, schema=None):
+    schema = results_schema(results) if schema is None else schema
+    arrays = [to_arrow(results.columns[field.name], field.type) for field in schema]
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+def results_from_table(table) -> CbaResultBatch:
+    return CbaResultBatch({name: from_arrow(table.column(name)) for name in table.column_names})
+
+
+def write_results(results, path):
+    """
+    Write a CbaResultBatch, or an iterable of them such as the chunks of a run, one row group each. All must have the
+    same fields and horizon, no file is written if there are none.
+    """
+    require_pyarrow()
+    batches = [results] if isinstance(results, CbaResultBatch) else results
+    writer = schema = None
+    try:
+        for batch in batches:
+            if writer is None:
+                schema = results_schema(batch)
+                writer = pq.ParquetWriter(path, schema)
+            writer.write_table(results_to_table(batch, schema))
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+def projection(columns):
+    """
+    The columns to read, like result_fields always with orma_way_id
+    """
+    return None if columns is None else ["orma_way_id"] + [c for c in columns if c != "orma_way_id"]
+
+
+def read_results(path, columns=None) -> CbaResultBatch:
+    """
+    The results of a Parquet file, only orma_way_id and the columns asked for (say ["npv", "work_year"]) if any
+    """
+    require_pyarrow()
+    return results_from_table(pq.read_table(path, columns=projection(columns)))
+
+
+def iter_results(path, columns=None, batch_size=65536):
+    """
+    The results of a Parquet file as CbaResultBatch of up to batch_size rows, without reading it all at once
+    """
+    require_pyarrow()
+    for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size, columns=projection(columns)):
+        yield results_from_table(pa.Table.from_batches([record_batch]))
@@ -0,0 +1,107 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from roads_cba_py.section import Section
+
+# Every agency and user cost in the model is a per km cost multiplied by the section length, while the traffic,
+# roughness and condition projections don't depend on the length at all. These are the result fields which scale
+# with length, everything else (including the selected alternative) is the same for sections which only differ in
+# their length.
+LENGTH_FIELDS = ("work_cost", "npv", "vehicle_utilization", "financial_recurrent_cost", "net_benefits")
+
+# The (filled in) section attributes which the computation actually depends on, apart from the length
+KEY_FIELDS = (
+    "lanes",
+    "width",
+    "road_class",
+    "terrain",
+    "temperature",
+    "moisture",
+    "surface_type",
+    "condition_class",
+    "roughness",
+    "traffic_growth",
+    "structural_no",
+    "pavement_age",
+    "aadt_motorcyle",
+    "aadt_carsmall",
+    "aadt_carmedium",
+    "aadt_delivery",
+    "aadt_4wheel",
+    "aadt_smalltruck",
+    "aadt_mediumtruck",
+    "aadt_largetruck",
+    "aadt_articulatedtruck",
+    "aadt_smallbus",
+    "aadt_mediumbus",
+    "aadt_largebus",
+    "aadt_total",
+)
+
+
+def section_key(section: Section):
+    """
+    The length free canonical inputs of a section whose defaults have been filled, or None if it can't be cached
+    """
+    if not section.length or section.length <= 0:
+        return None
+    return tuple(getattr(section, f) for f in KEY_FIELDS)
+
+
+def per_km(row, length):
+    return {k: np.asarray(v) / length if k in LENGTH_FIELDS else v for k, v in row.items()}
+
+
+def for_section(per_km_row, section: Section):
+    row = {k: v * section.length if k in LENGTH_FIELDS else v for k, v in per_km_row.items()}
+    row["orma_way_id"] = section.orma_way_id
+    return row
+
+
+class LengthNormalizedCache(object):
+    """
+    In process LRU cache of per km CBA results, keyed on the length free inputs of a section. A hit is rescaled to the
+    length of the requested section, so it matches a direct computation up to floating point rounding.
+    """
+
+    def __init__(self, max_size=100000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, section: Section):
+        """
+        The cached result row for this section (rescaled to its length) or None
+        """
+        key = section_key(section)
+        with self.lock:
+            per_km_row = self.entries.get(key) if key is not None else None
+            if per_km_row is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return for_section(per_km_row, section)
+
+    def put(self, section: Section, row):
+        key = section_key(section)
+        if key is None or self.max_size <= 0:
+            return
+        with self.lock:
+            self.entries[key] = per_km(row, section.length)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.hits = 0
+            self.misses = 0
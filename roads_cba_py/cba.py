@@ -1,8 +1,11 @@
+import warnings
+from typing import List
+
 import numpy as np
-from numpy_financial import irr
 
-from roads_cba_py import defaults
-from roads_cba_py.cba_result import CbaResult
+from roads_cba_py import defaults, deterioration
+from roads_cba_py.cache import LengthNormalizedCache, section_key, per_km, for_section
+from roads_cba_py.cba_result import CbaResult, CbaResultBatch, result_fields, needs_alternatives, project
 from roads_cba_py.defaults import (
     dDiscount_Rate,
     dEconomic_Factor,
@@ -24,16 +27,101 @@ from roads_cba_py.defaults import (
     cc_from_iri_lu,
     default_lanes,
     traffic_ranges,
-    alternatives,
+    work_catalogue,
     traffic_range_lu,
     lanes_lu,
 )
+from roads_cba_py.financial import irr
+from roads_cba_py.schedule import AlternativeSchedules, ROWS_PER_SURFACE
 from roads_cba_py.section import Section
+from roads_cba_py.section_batch import SectionBatch, AADT_FIELDS
+from roads_cba_py.traffic import TrafficTables
+from roads_cba_py.user_costs import user_costs
 from roads_cba_py.utils import print_diff
+from roads_cba_py.workspace import Workspace, ThreadLocalWorkspaces, loop_buffers
+
+# Error codes of CostBenefitAnalysisModel.fill_defaults_batch, one per ValueError fill_defaults raises
+FILLED = 0
+NO_SURFACE_TYPE = 1
+NO_WIDTH = 2
+NO_CONDITION = 3
+NO_TRAFFIC = 4
+NO_TRAFFIC_LEVEL = 5
+AADT_MISMATCH = 6
+NO_STRUCTURAL_NO = 7
+OUT_OF_RANGE = 8
+
+FILL_ERRORS = {
+    FILLED: None,
+    NO_SURFACE_TYPE: "Must define either road type or road surface type",
+    NO_WIDTH: "Must define either road width or number of lanes",
+    NO_CONDITION: "Must define either roughness or road condition class",
+    NO_TRAFFIC: "Must define either traffic level class or traffic data",
+    NO_TRAFFIC_LEVEL: "Missing traffic level",
+    AADT_MISMATCH: "Sum of veh. class AADT != total AADT",
+    NO_STRUCTURAL_NO: "No default structural number above traffic level 14",
+    OUT_OF_RANGE: "Value out of the range of the model tables",
+}
 
 
 class CostBenefitAnalysisModel:
-    def __init__(self):
+    # "loop" walks every (alternative, year) cell in python, "vectorized" runs the batched engine on a single section
+    ENGINES = ("loop", "vectorized")
+    # Implementation of the pavement recurrence in the batched engine, "numba" compiles it (see jit) and "auto" picks
+    # it when numba is installed
+    BACKENDS = ("numpy", "numba", "auto")
+    # Floating point type of the cost grids of the batched engine
+    PRECISIONS = ("float64", "float32")
+    # "standard" evaluates the 13 alternatives of dWorkEvaluated, "extended" every applicable work of the catalogue in
+    # each of work_years (see AlternativeSchedules.extended)
+    SEARCHES = ("standard", "extended")
+
+    def __init__(
+        self,
+        engine="loop",
+        cache_size=0,
+        reuse_workspace=False,
+        backend="numpy",
+        precision="float64",
+        horizon=20,
+        search="standard",
+        work_years=range(1, 7),
+    ):
+        """
+        horizon is the number of years of the analysis, every projection and the cash flows of NPV and EIRR span it.
+        Works are repaired every repair period up to its end, over a longer horizon than 20 years that can be more
+        than the 4 repairs of the original model.
+        cache_size > 0 keeps up to that many per km results in a LengthNormalizedCache, so that sections which only
+        differ in length are computed once. reuse_workspace makes the loop engine reuse one set of output arrays per
+        thread rather than allocating them for every section. precision="float32" halves the memory of the cost and
+        user cost grids of the batched engine, roughness, NPV and EIRR are still computed in float64. search="extended"
+        tries every applicable work in each of work_years, always with the batched engine.
+        """
+        if engine not in self.ENGINES:
+            raise ValueError(f"Unknown engine '{engine}', expected one of {self.ENGINES}")
+        if backend not in self.BACKENDS:
+            raise ValueError(f"Unknown backend '{backend}', expected one of {self.BACKENDS}")
+        if precision not in self.PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {self.PRECISIONS}")
+        if search not in self.SEARCHES:
+            raise ValueError(f"Unknown search '{search}', expected one of {self.SEARCHES}")
+        if int(horizon) != horizon or horizon < 1:
+            raise ValueError(f"The horizon must be a positive number of years, got {horizon}")
+        if backend in ("numba", "auto"):
+            # Only imported when asked for, importing numba (and loading its cache) takes a while
+            from roads_cba_py import jit
+
+            backend = "numba" if jit.AVAILABLE else "numpy" if backend == "auto" else backend
+        if backend == "numba" and not jit.AVAILABLE:
+            warnings.warn("numba is not installed, falling back to the numpy backend")
+            backend = "numpy"
+        self.engine = engine
+        self.backend = backend
+        self.dtype = np.dtype(precision)
+        self.horizon = int(horizon)
+        self.search = search
+        self.cache = LengthNormalizedCache(cache_size) if cache_size > 0 else None
+        self.workspaces = ThreadLocalWorkspaces(loop_buffers(self.horizon)) if reuse_workspace else None
         self.dDiscount_Rate = dDiscount_Rate
         self.dEconomic_Factor = dEconomic_Factor
         self.dGrowth = dGrowth
@@ -43,6 +131,7 @@ class CostBenefitAnalysisModel:
         self.dWidthDefaults = dWidthDefaults
         self.dConditionData = dConditionData
         self.dRoadWorks = dRoadWorks
+        self.works = work_catalogue
         self.dRecurrent = dRecurrent
         self.dRecMult = dRecMult
         self.dWorkEvaluated = dWorkEvaluated
@@ -52,31 +141,58 @@ class CostBenefitAnalysisModel:
         self.dRoadDet = dRoadDet
         self.iri_cc_df = iri_cc_df
         self.default_lanes = default_lanes
+        if search == "extended":
+            self.schedules = AlternativeSchedules.extended(self.dWorkEvaluated, self.works, self.horizon, work_years)
+        else:
+            self.schedules = AlternativeSchedules(self.dWorkEvaluated, self.works, self.horizon)
+        self.traffic = TrafficTables(self.dGrowth, self.dVehicleFleet, self.dWidthDefaults, self.horizon)
 
-    def compute_cba_for_section(self, section: Section) -> CbaResult:
+    def compute_cba_for_section(self, section: Section, fields=None) -> CbaResult:
         """
-        Main entry to computer Cost Benefit Analysis for each road section
+        Main entry to computer Cost Benefit Analysis for each road section. fields (e.g. SUMMARY_FIELDS) restricts the
+        result to those fields and skips computing the others, by default all fields are computed. All but the
+        TRAFFIC_FIELDS depend on the selected alternative, for which all alternatives are evaluated with all their
+        costs whichever of them are requested. Only a request of TRAFFIC_FIELDS alone skips that evaluation.
+        """
+        section = self.fill_defaults(section)
+        fields = result_fields(fields)
+
+        if self.cache is not None:
+            cached = self.cache.get(section)
+            if cached is not None:
+                return CbaResultBatch.to_result(project(cached, fields))
+
+        # The cache only holds complete results. The loop engine only knows the 13 standard alternatives.
+        compute_fields = fields if self.cache is None else None
+        if self.engine == "vectorized" or self.search == "extended":
+            result = self.compute_cba_for_chunk(self.get_section_arrays([section]), compute_fields)[0]
+        else:
+            result = self.compute_cba_for_section_loop(section, compute_fields)
+
+        if self.cache is not None:
+            row = result.to_native()
+            self.cache.put(section, row)
+            if compute_fields != fields:
+                result = CbaResultBatch.to_result(project(row, fields))
+        return result
+
+    def compute_cba_for_section_loop(self, section: Section, fields=None) -> CbaResult:
+        """
+        Computes the Cost Benefit Analysis of a section whose defaults have been filled, one alternative at a time
         """
 
         # Step 1: Get input attributes from section
-        section = self.fill_defaults(section)
         dLength = section.length
         iLanes = section.lanes
-        dWidth = section.width
         iRoadClass = section.road_class
-        iTerrain = section.terrain
-        iTemperature = section.temperature
-        iMoisture = section.moisture
         # iRoadType = section.road_type
         iSurfaceType = section.surface_type
         iConditionClass = section.condition_class
 
-        dStructuralNo = section.structural_no
-        iPavementAge = section.pavement_age
         # iDrainageClass = None
         iGrowthScenario = section.traffic_growth
 
-        dAADT = np.zeros((13, 20), dtype=np.float64)
+        dAADT = np.zeros((13, self.horizon), dtype=np.float64)
         dAADT[0][0] = section.aadt_motorcyle
         dAADT[1][0] = section.aadt_carsmall
         dAADT[2][0] = section.aadt_carmedium
@@ -91,55 +207,136 @@ class CostBenefitAnalysisModel:
         dAADT[11][0] = section.aadt_largebus
         dAADT[12][0] = section.aadt_total
 
-        iNoAlernatives, dAlternatives = self.compute_alternatives(iSurfaceType, iRoadClass, iConditionClass)
-
-        dCostFactor = self.compute_cost_factor(iSurfaceType, iRoadClass, iConditionClass)
-
         # Annual traffic
         dAADT = self.compute_annual_traffic(dAADT, iGrowthScenario)
         # ESA Loading
         dESATotal = self.compute_esa_loading(dAADT, iLanes)
-        # Truck percent
-        dTRucks = self.compute_trucks_percent(dAADT)
-        # Vehicle Utilization
-        dUtilization = self.compute_vehicle_utilization(dAADT, dLength)
+
+        fields = result_fields(fields)
+        if needs_alternatives(fields):
+            iNoAlernatives, dAlternatives = self.compute_alternatives(iSurfaceType, iRoadClass, iConditionClass)
+            dCostFactor = self.compute_cost_factor(iSurfaceType, iRoadClass, iConditionClass)
+            evaluated = self.evaluate_alternatives_loop(
+                section, iNoAlernatives, dAlternatives, dCostFactor, dAADT, dESATotal, detail=fields == result_fields()
+            )
+
+            iTheSelected = evaluated["iTheSelected"]
+            iSolWork = evaluated["iSolWork"][iTheSelected]
+            dNetTotal = evaluated["dNetTotal"]
+            dCondIRI = evaluated["dCondIRI"]
+            dCondCON = evaluated["dCondCON"]
+            dCostRecurrentFin = evaluated["dCostRecurrentFin"]
+
+        ###########################################################
+        # Get the output results, only the requested ones are computed. The alternatives are only evaluated if one of
+        # them depends on the selected alternative (see TRAFFIC_FIELDS).
+        ###########################################################
+        results = {
+            "work_class": lambda: self.works.decode("work_class", iSolWork),
+            "work_type": lambda: self.works.decode("code", iSolWork),
+            "work_name": lambda: self.works.decode("name", iSolWork),
+            "work_cost": lambda: evaluated["dSolCost"][iTheSelected],
+            "work_cost_km": lambda: evaluated["dSolCostkm"][iTheSelected],
+            "work_year": lambda: int(evaluated["iSolYear"][iTheSelected]),
+            "npv": lambda: evaluated["dSolNPV"][iTheSelected],
+            "npv_km": lambda: evaluated["dSolNPVKm"][iTheSelected],
+            "npv_cost": lambda: evaluated["dSolNPVCost"][iTheSelected],
+            "eirr": lambda: irr(dNetTotal[iTheSelected]),
+            "aadt": lambda: dAADT[12].tolist(),
+            "truck_percent": lambda: self.compute_trucks_percent(dAADT),
+            "vehicle_utilization": lambda: self.compute_vehicle_utilization(dAADT, dLength),
+            "esa_loading": lambda: dESATotal[0],
+            "iri_projection": lambda: dCondIRI[iTheSelected].tolist(),
+            "iri_base": lambda: dCondIRI[0].tolist(),
+            "con_projection": lambda: dCondCON[iTheSelected].tolist(),
+            "con_base": lambda: dCondCON[0].tolist(),
+            "financial_recurrent_cost": lambda: dCostRecurrentFin[iTheSelected].tolist(),
+            "net_benefits": lambda: dNetTotal[iTheSelected].tolist(),
+            "orma_way_id": lambda: section.orma_way_id,
+        }
+        return CbaResult({k: results[k]() for k in fields})
+
+    def evaluate_alternatives_loop(
+        self, section, iNoAlernatives, dAlternatives, dCostFactor, dAADT, dESATotal, detail=True
+    ):
+        """
+        Reference engine: evaluates each alternative one year at a time. Without detail the per vehicle speeds, which
+        none of the results use, aren't kept.
+        """
+        dLength = section.length
+        iLanes = section.lanes
+        dWidth = section.width
+        iTerrain = section.terrain
+        iTemperature = section.temperature
+        iMoisture = section.moisture
+        iSurfaceType = section.surface_type
+        dStructuralNo = section.structural_no
+        iPavementAge = section.pavement_age
+        years = self.horizon
+
+        # Years of the initial work and of its repairs for each alternative
+        schedule = self.get_work_evalauted_index(iSurfaceType, section.road_class, section.condition_class)
+        is_work, is_repair = self.schedules.is_work[schedule], self.schedules.is_repair[schedule]
 
         ########################
         # Output variables
         ########################
-        sRoadCode = np.empty((13, 20), dtype="<U30")  # alternatives, years
-        dCondIRI = np.zeros((13, 20), dtype=np.float64)  # alternatives, years
-        dCondCON = np.zeros((13, 20), dtype=np.int16)  # alternatives, years
-        dCondSNC = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        iCondAge = np.zeros((13, 20), dtype=np.int16)  # ' alternatives, years
-        iCondLanes = np.zeros((13, 20), dtype=np.int16)  # ' alternatives, years
-        dCondWidth = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCondLength = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        iCondSurface = np.zeros((13, 20), dtype=np.int16)  # ' alternatives, years
-        dCostCapitalFin = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostRepairFin = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostRecurrentFin = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostAgencyFin = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostCapitalEco = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostRepairEco = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostRecurrentEco = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostAgencyEco = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostVOC = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostTime = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCostUsers = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dCondSpeed = np.zeros((13, 20, 12), dtype=np.float64)  # uble  ' alterntive, years, vehicles
-        dCondSpeedAve = np.zeros((13, 20), dtype=np.float64)  # ' alternative, year
-        dCostTotal = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dNetTotal = np.zeros((13, 20), dtype=np.float64)  # ' alternatives, years
-        dSolNPV = np.zeros((13,), dtype=np.float64)  # As Double ' altertnatives
-        dSolNPVKm = np.zeros((13,), dtype=np.float64)  # As Double ' alternatives
-        dSolNPVCost = np.zeros((13,), dtype=np.float64)  # As Double ' alternatives
-        sSolClass = np.empty((13,), dtype="<U30")  # As String ' alternatives
-        sSolCode = np.empty((13,), dtype="<U30")  # As String ' alternatives
-        sSolName = np.empty((13,), dtype="<U35")  # As String ' alternatives
-        dSolCost = np.zeros((13,), dtype=np.float64)  # As Double ' alternatives
-        dSolCostkm = np.zeros((13,), dtype=np.float64)  # As Double ' alternatives
-        iSolYear = np.zeros((13,), dtype=np.float64)  # As Double ' alternatives
+        workspace = self.get_workspace()
+        iRoadWork = workspace["iRoadWork"]  # alternatives, years
+        dCondIRI = workspace["dCondIRI"]  # alternatives, years
+        dCondCON = workspace["dCondCON"]  # alternatives, years
+        dCondSNC = workspace["dCondSNC"]  # ' alternatives, years
+        iCondAge = workspace["iCondAge"]  # ' alternatives, years
+        iCondLanes = workspace["iCondLanes"]  # ' alternatives, years
+        dCondWidth = workspace["dCondWidth"]  # ' alternatives, years
+        dCondLength = workspace["dCondLength"]  # ' alternatives, years
+        iCondSurface = workspace["iCondSurface"]  # ' alternatives, years
+        dCostCapitalFin = workspace["dCostCapitalFin"]  # ' alternatives, years
+        dCostRepairFin = workspace["dCostRepairFin"]  # ' alternatives, years
+        dCostRecurrentFin = workspace["dCostRecurrentFin"]  # ' alternatives, years
+        dCostAgencyFin = workspace["dCostAgencyFin"]  # ' alternatives, years
+        dCostCapitalEco = workspace["dCostCapitalEco"]  # ' alternatives, years
+        dCostRepairEco = workspace["dCostRepairEco"]  # ' alternatives, years
+        dCostRecurrentEco = workspace["dCostRecurrentEco"]  # ' alternatives, years
+        dCostAgencyEco = workspace["dCostAgencyEco"]  # ' alternatives, years
+        dCostVOC = workspace["dCostVOC"]  # ' alternatives, years
+        dCostTime = workspace["dCostTime"]  # ' alternatives, years
+        dCostUsers = workspace["dCostUsers"]  # ' alternatives, years
+        dCondSpeed = workspace["dCondSpeed"]  # uble  ' alterntive, years, vehicles
+        dCondSpeedAve = workspace["dCondSpeedAve"]  # ' alternative, year
+        dCostTotal = workspace["dCostTotal"]  # ' alternatives, years
+        dNetTotal = workspace["dNetTotal"]  # ' alternatives, years
+        dSolNPV = workspace["dSolNPV"]  # As Double ' altertnatives
+        dSolNPVKm = workspace["dSolNPVKm"]  # As Double ' alternatives
+        dSolNPVCost = workspace["dSolNPVCost"]  # As Double ' alternatives
+        iSolWork = workspace["iSolWork"]  # work number ' alternatives
+        dSolCost = workspace["dSolCost"]  # As Double ' alternatives
+        dSolCostkm = workspace["dSolCostkm"]  # As Double ' alternatives
+        iSolYear = workspace["iSolYear"]  # As Double ' alternatives
+
+        # The year by year trajectories, which are copied between alternatives where they coincide
+        trajectories = (
+            iRoadWork,
+            dCondIRI,
+            dCondCON,
+            dCondSNC,
+            iCondAge,
+            iCondLanes,
+            dCondWidth,
+            dCondLength,
+            iCondSurface,
+            dCostCapitalFin,
+            dCostRepairFin,
+            dCostRecurrentFin,
+            dCostAgencyFin,
+            dCostCapitalEco,
+            dCostRepairEco,
+            dCostRecurrentEco,
+            dCostAgencyEco,
+        )
+        shared_prefix = self.schedules.shared_prefix[schedule].tolist()
+        shift_source = self.schedules.shift_source[schedule].tolist()
+        shift = self.schedules.shift[schedule].tolist()
 
         ####################################################
         # Loop alternatives
@@ -160,15 +357,32 @@ class CostBenefitAnalysisModel:
             iYearSurface = iSurfaceType
 
             work_idx = int(dAlternatives[ia, 0]) - 1
-            work_year = int(dAlternatives[ia, 1])
-            alt = alternatives[work_idx]
+            is_work_year = is_work[ia].tolist()
+            is_repair_year = is_repair[ia].tolist()
+            alt = self.works.table[work_idx]
 
-            iTheRepair = alt.repair
-            repair_years = [work_year + i * alt.repair_period for i in [1, 2, 3, 4]]
+            repair_idx = alt["repair"] - 1
+            repair_alt = self.works.table[repair_idx]
 
             dSolNPV[ia] = 0
 
-            for iy in range(20):
+            # Until its first work the alternative follows the base alternative
+            start = shared_prefix[ia]
+            if start > 0:
+                for trajectory in trajectories:
+                    trajectory[ia, :start] = trajectory[0, :start]
+                dYearRoughness, iYearAge = dCondIRI[ia, start - 1], iCondAge[ia, start - 1]
+
+            # From its work on it follows an earlier alternative with the same work, shifted
+            source, delay = shift_source[ia], shift[ia]
+            if source >= 0 and (delay == 0 or self.is_time_invariant(iSurfaceType, alt, repair_alt)):
+                for trajectory in trajectories:
+                    trajectory[ia, start:] = trajectory[source, start - delay : years - delay]
+                iSolWork[ia], dSolCost[ia], dSolCostkm[ia] = iSolWork[source], dSolCost[source], dSolCostkm[source]
+                iSolYear[ia] = iSolYear[source] + delay
+                continue
+
+            for iy in range(start, years):
                 iCondLanes[ia, iy] = iYearLanes
                 dCondWidth[ia, iy] = dYearWidth
                 dCondLength[ia, iy] = dYearLength
@@ -176,49 +390,49 @@ class CostBenefitAnalysisModel:
                 iCondSurface[ia, iy] = iYearSurface
 
                 # Capital Road Work
-                if iy == work_year - 1:
+                if is_work_year[iy]:
                     # Look at the Number of Lane Classes
-                    if alt.lanes_class is not None and alt.lanes_class > 0:
-                        iCondLanes[ia, iy] = iYearLanes = alt.condition
-                        dCondWidth[ia, iy] = dYearWidth = alt.width
-                        iCondSurface[ia, iy] = iYearSurface = alt.surface
+                    if alt["lanes_class"] > 0:
+                        iCondLanes[ia, iy] = iYearLanes = alt["lanes_class"]
+                        dCondWidth[ia, iy] = dYearWidth = alt["width"]
+                        iCondSurface[ia, iy] = iYearSurface = alt["surface"]
 
                     # Structural number after periodic maintenance for bituminous roads
-                    if alt.thickness is not None and alt.thickness > 0:
-                        dCondSNC[ia, iy] = dYearSNC = dCondSNC[ia, iy] + alt.thickness * alt.strength * 0.0393701
+                    if alt["thickness"] > 0:
+                        dCondSNC[ia, iy] = dYearSNC = dCondSNC[ia, iy] + alt["thickness"] * alt["strength"] * 0.0393701
 
                     # Structural number after rehabiliation for bituminous roads
-                    if alt.snc is not None and alt.snc > 0:
-                        dCondSNC[ia, iy] = dYearSNC = alt.snc
+                    if alt["snc"] > 0:
+                        dCondSNC[ia, iy] = dYearSNC = alt["snc"]
 
                     # Capital work costs
-                    unit_cst = alt.get_unit_cost(iTerrain)
+                    unit_cst = self.works.unit_costs[work_idx, iTerrain - 1]
                     dCostCapitalFin[ia, iy] = unit_cst * dCondLength[ia, iy] * dCondWidth[ia, iy] / 1000.0 * dCostFactor
                     dCostCapitalEco[ia, iy] = dCostCapitalFin[ia, iy] * self.dEconomic_Factor
 
-                    sRoadCode[ia, iy] = sSolCode[ia] = alt.code
-                    sSolName[ia] = alt.name
-                    sSolClass[ia] = alt.work_class
+                    iRoadWork[ia, iy] = iSolWork[ia] = work_idx + 1
 
                     iSolYear[ia] = iy + 1  # Since iy is counted from 0 and year order starts from 1
                     dSolCost[ia] = dCostCapitalFin[ia, iy]
                     dSolCostkm[ia] = dSolCost[ia] / dCondLength[ia, iy]
 
                 # repair road work
-                if (iy + 1) in repair_years:
-                    repair_alt = alternatives[iTheRepair - 1]
-                    sRoadCode[ia, iy] = repair_alt.code
-                    if repair_alt.lanes_class and repair_alt.lanes_class > 0:
-                        iCondLanes[ia, iy] = iYearLanes = repair_alt.lanes_class
-                        dCondWidth[ia, iy] = dYearWidth = repair_alt.width
-                        iCondSurface[ia, iy] = iYearSurface = repair_alt.surface
+                if is_repair_year[iy]:
+                    iRoadWork[ia, iy] = repair_idx + 1
+                    if repair_alt["lanes_class"] > 0:
+                        iCondLanes[ia, iy] = iYearLanes = repair_alt["lanes_class"]
+                        dCondWidth[ia, iy] = dYearWidth = repair_alt["width"]
+                        iCondSurface[ia, iy] = iYearSurface = repair_alt["surface"]
 
                     # structural number
-                    if repair_alt.snc and repair_alt.snc > 0:
-                        dCondSNC[ia, iy] = dYearSNC = repair_alt.snc
+                    if repair_alt["snc"] > 0:
+                        dCondSNC[ia, iy] = dYearSNC = repair_alt["snc"]
 
                     dCostRepairFin[ia, iy] = (
-                        repair_alt.get_unit_cost(iTerrain) * dCondLength[ia, iy] * dCondWidth[ia, iy] / 1000.0
+                        self.works.unit_costs[repair_idx, iTerrain - 1]
+                        * dCondLength[ia, iy]
+                        * dCondWidth[ia, iy]
+                        / 1000.0
                     )
                     dCostRepairEco[ia, iy] = dCostRepairFin[ia, iy] * self.dEconomic_Factor
 
@@ -243,56 +457,20 @@ class CostBenefitAnalysisModel:
 
                 iYearAge = iYearAge + 1
 
-                if iy == work_year - 1:
+                if is_work_year[iy]:
                     """
                     Rougnesss effect function of road work type
                     """
-                    dYearRoughness = alt.iri
+                    dYearRoughness = alt["iri"]
                     iYearAge = 1
 
-                if (iy + 1) in repair_years:
-                    dYearRoughness = repair_alt.iri
+                if is_repair_year[iy]:
+                    dYearRoughness = repair_alt["iri"]
                     iYearAge = 1
 
                 dCondIRI[ia, iy] = dYearRoughness
                 iCondAge[ia, iy] = iYearAge
 
-                # VOC
-                dCostVOC[ia, iy] = 0
-                lane_cond_idx = iCondLanes[ia, iy] - 1
-                terrain_idx = iTerrain - 1
-                iri2, iri3 = np.power(dYearRoughness, 2), np.power(dYearRoughness, 3)
-
-                voc = (
-                    self.dVOC[lane_cond_idx, terrain_idx, 0, :]
-                    + (self.dVOC[lane_cond_idx, terrain_idx, 1, :] * dYearRoughness)
-                    + (self.dVOC[lane_cond_idx, terrain_idx, 2, :] * iri2)
-                    + (self.dVOC[lane_cond_idx, terrain_idx, 3, :] * iri3)
-                ) * dAADT[0:12, iy]
-                dCostVOC[ia, iy] = voc.sum() * dCondLength[ia, iy] * 365 / 1000000
-
-                # Speed
-                speed = (
-                    self.dSPEED[lane_cond_idx, terrain_idx, 0, :]
-                    + (self.dSPEED[lane_cond_idx, terrain_idx, 1, :] * dYearRoughness)
-                    + (self.dSPEED[lane_cond_idx, terrain_idx, 2, :] * iri2)
-                    + (self.dSPEED[lane_cond_idx, terrain_idx, 3, :] * iri3)
-                )
-
-                dCondSpeed[ia, iy, :] = speed
-                dCondSpeedAve[ia, iy] = speed.sum() / 12
-
-                dCostTime[ia, iy] = (
-                    1
-                    / speed
-                    * dCondLength[ia, iy]
-                    * self.dVehicleFleet[:, 1]
-                    * self.dVehicleFleet[:, 2]
-                    * dAADT[:-1, iy]
-                    * 365
-                    / 1000000
-                ).sum()
-
                 # Pavement Condition Class function of rougness
                 dCondCON[ia, iy] = cc_from_iri_lu[iSurfaceType](dCondIRI[ia, iy])
                 dCostRecurrentFin[ia, iy] = dCostRecurrentFin[ia, iy] * dRecMult[dCondCON[ia, iy] - 1]
@@ -301,7 +479,18 @@ class CostBenefitAnalysisModel:
                 # road agency costs
                 dCostAgencyFin[ia, iy] = dCostCapitalFin[ia, iy] + dCostRepairFin[ia, iy] + dCostRecurrentFin[ia, iy]
                 dCostAgencyEco[ia, iy] = dCostCapitalEco[ia, iy] + dCostRepairEco[ia, iy] + dCostRecurrentEco[ia, iy]
+            # End loop iy
+
+        # Road user costs of all alternatives and years at once
+        n = iNoAlernatives
+        dCostVOC[:n], speed, speed_ave, dCostTime[:n] = user_costs(
+            dCondIRI[:n], iCondLanes[:n], iTerrain, dAADT[0:12].T, dLength, self.dVOC, self.dSPEED, self.dVehicleFleet
+        )
+        if detail:
+            dCondSpeed[:n], dCondSpeedAve[:n] = speed, speed_ave
 
+        for ia in range(iNoAlernatives):
+            for iy in range(years):
                 # Users and Total
                 dCostUsers[ia, iy] = dCostVOC[ia, iy] + dCostTime[ia, iy]
                 dCostTotal[ia, iy] = dCostAgencyEco[ia, iy] + dCostUsers[ia, iy]
@@ -324,72 +513,371 @@ class CostBenefitAnalysisModel:
                 iTheSelected = ia
                 dNPVMax = dSolNPV[ia]
 
+        return {
+            "iTheSelected": iTheSelected,
+            "iSolWork": iSolWork,
+            "dSolCost": dSolCost,
+            "dSolCostkm": dSolCostkm,
+            "iSolYear": iSolYear,
+            "dSolNPV": dSolNPV,
+            "dSolNPVKm": dSolNPVKm,
+            "dSolNPVCost": dSolNPVCost,
+            "dNetTotal": dNetTotal,
+            "dCondIRI": dCondIRI,
+            "dCondCON": dCondCON,
+            "dCostRecurrentFin": dCostRecurrentFin,
+        }
+
+    def get_workspace(self) -> Workspace:
+        """
+        The output arrays for evaluate_alternatives_loop, zeroed: this thread's reused workspace or a new one
+        """
+        if self.workspaces is None:
+            return Workspace(loop_buffers(self.horizon))
+        return self.workspaces.get()
+
+    def compute_cba_for_sections(self, sections: List[Section], chunk_size=1024, fields=None) -> CbaResultBatch:
+        """
+        Computes the Cost Benefit Analysis for a whole batch of road sections at once. Every intermediate value is a
+        (sections, alternatives, years) tensor, sections are processed chunk_size at a time to bound memory use.
+        fields restricts the result columns as for compute_cba_for_section.
+        """
+        sections = [self.fill_defaults(section) for section in sections]
+        fields = result_fields(fields)
+        if self.cache is None or not sections:
+            return self.compute_cba_in_chunks(sections, chunk_size, fields)
+
+        # Only compute the sections which aren't cached yet, and only once for sections with the same inputs
+        rows = [self.cache.get(section) for section in sections]
+        misses = {}
+        for i, (section, row) in enumerate(zip(sections, rows)):
+            if row is None:
+                misses.setdefault(section_key(section) or ("uncached", i), []).append(i)
+
+        computed = self.compute_cba_in_chunks([sections[indices[0]] for indices in misses.values()], chunk_size)
+        for j, (first, *others) in enumerate(misses.values()):
+            rows[first] = computed.row(j)
+            self.cache.put(sections[first], rows[first])
+            for i in others:
+                rows[i] = for_section(per_km(rows[first], sections[first].length), sections[i])
+
+        return CbaResultBatch.from_rows([project(row, fields) for row in rows])
+
+    def compute_cba_in_chunks(self, sections: List[Section], chunk_size, fields=None) -> CbaResultBatch:
+        chunks = [
+            self.compute_cba_for_chunk(self.get_section_arrays(sections[i : i + chunk_size]), fields)
+            for i in range(0, max(len(sections), 1), chunk_size)
+        ]
+        return CbaResultBatch.concatenate(chunks)
+
+    def compute_cba_for_batch(self, batch: SectionBatch, chunk_size=1024, fields=None):
+        """
+        compute_cba_for_sections for a SectionBatch, with defaults filled by fill_defaults_batch. Returns the results
+        of the sections that could be filled, in order, and the error codes of all sections (see FILL_ERRORS).
+        """
+        batch, errors = self.fill_defaults_batch(batch)
+        batch = batch[np.nonzero(errors == FILLED)[0]]
+        chunks = [
+            self.compute_cba_for_chunk(self.get_section_arrays(batch[i : i + chunk_size]), result_fields(fields))
+            for i in range(0, max(len(batch), 1), chunk_size)
+        ]
+        return CbaResultBatch.concatenate(chunks), errors
+
+    @staticmethod
+    def get_section_arrays(sections: List[Section]):
+        """
+        The section inputs of the batched engine as arrays, from Sections or a SectionBatch
+        """
+
+        def column(name, dtype):
+            if isinstance(sections, SectionBatch):
+                return sections[name].astype(dtype)
+            return np.array([getattr(s, name) for s in sections], dtype=dtype)
+
+        if isinstance(sections, SectionBatch):
+            aadt = np.column_stack([sections.get_aadts(), sections["aadt_total"]])
+        else:
+            aadt = np.array([s.get_aadts() + (s.aadt_total,) for s in sections], dtype=np.float64).reshape(-1, 13)
+
+        return {
+            "orma_way_id": column("orma_way_id", object),
+            "length": column("length", np.float64),
+            "lanes": column("lanes", np.int64),
+            "width": column("width", np.float64),
+            "road_class": column("road_class", np.int64),
+            "terrain": column("terrain", np.int64),
+            "temperature": column("temperature", np.int64),
+            "moisture": column("moisture", np.int64),
+            "surface_type": column("surface_type", np.int64),
+            "condition_class": column("condition_class", np.int64),
+            "roughness": column("roughness", np.float64),
+            "structural_no": column("structural_no", np.float64),
+            "pavement_age": column("pavement_age", np.int64),
+            "traffic_growth": column("traffic_growth", np.int64),
+            "aadt": aadt,
+        }
+
+    def compute_cba_for_chunk(self, inputs, fields=None) -> CbaResultBatch:
+        """
+        Batched equivalent of compute_cba_for_section over the section arrays built by get_section_arrays
+        """
+        iNoSections = len(inputs["length"])
+        dLength = inputs["length"]
+        dAADT, dESATotal, evaluated = self.evaluate_chunk(inputs, alternatives=needs_alternatives(fields))
+
         ###########################################################
-        # Get the output results
+        # Get the output results for the selected alternatives
         ###########################################################
-        results = {
-            "work_class": sSolClass[iTheSelected],
-            "work_type": sSolCode[iTheSelected],
-            "work_name": sSolName[iTheSelected],
-            "work_cost": dSolCost[iTheSelected],
-            "work_cost_km": dSolCostkm[iTheSelected],
-            "work_year": int(iSolYear[iTheSelected]),
-            "npv": dSolNPV[iTheSelected],
-            "npv_km": dSolNPVKm[iTheSelected],
-            "npv_cost": dSolNPVCost[iTheSelected],
-            "eirr": irr(dNetTotal[iTheSelected]),
-            "aadt": dAADT[12].tolist(),
-            "truck_percent": dTRucks,
-            "vehicle_utilization": dUtilization,
-            "esa_loading": dESATotal[0],
-            "iri_projection": dCondIRI[iTheSelected].tolist(),
-            "iri_base": dCondIRI[0].tolist(),
-            "con_projection": dCondCON[iTheSelected].tolist(),
-            "con_base": dCondCON[0].tolist(),
-            "financial_recurrent_cost": dCostRecurrentFin[iTheSelected].tolist(),
-            "net_benefits": dNetTotal[iTheSelected].tolist(),
-            "orma_way_id": section.orma_way_id,
+        if evaluated is not None:
+            rows = np.arange(iNoSections)
+            iTheSelected = evaluated["iTheSelected"]
+            work_idx = evaluated["work_idx"][rows, iTheSelected]
+            in_horizon = evaluated["iSolYear"][rows, iTheSelected] > 0
+            dNetTotal = evaluated["dNetTotal"][rows, iTheSelected]
+
+            work_no = np.where(in_horizon, work_idx + 1, 0)
+
+        # Only the requested columns are computed, the alternatives only evaluated if one of them needs them
+        columns = {
+            "orma_way_id": lambda: inputs["orma_way_id"],
+            "work_class": lambda: self.works.decode("work_class", work_no),
+            "work_type": lambda: self.works.decode("code", work_no),
+            "work_name": lambda: self.works.decode("name", work_no),
+            "work_cost": lambda: evaluated["dSolCost"][rows, iTheSelected],
+            "work_cost_km": lambda: evaluated["dSolCostkm"][rows, iTheSelected],
+            "work_year": lambda: evaluated["iSolYear"][rows, iTheSelected],
+            "npv": lambda: evaluated["dSolNPV"][rows, iTheSelected],
+            "npv_km": lambda: evaluated["dSolNPVKm"][rows, iTheSelected],
+            "npv_cost": lambda: evaluated["dSolNPVCost"][rows, iTheSelected],
+            "eirr": lambda: irr(dNetTotal),
+            "aadt": lambda: dAADT[:, 12, :],
+            "truck_percent": lambda: self.compute_trucks_percent(dAADT),
+            "vehicle_utilization": lambda: self.compute_vehicle_utilization(dAADT, dLength),
+            "esa_loading": lambda: dESATotal[:, 0],
+            "iri_projection": lambda: evaluated["dCondIRI"][rows, iTheSelected],
+            "iri_base": lambda: evaluated["dCondIRI"][:, 0],
+            "con_projection": lambda: evaluated["dCondCON"][rows, iTheSelected],
+            "con_base": lambda: evaluated["dCondCON"][:, 0],
+            "financial_recurrent_cost": lambda: evaluated["dCostRecurrentFin"][rows, iTheSelected],
+            "net_benefits": lambda: dNetTotal,
         }
-        return CbaResult(results)
+        return CbaResultBatch({k: columns[k]() for k in result_fields(fields)})
 
-    # This converts the surface type, road class condition class into an index offset into the dWorkEvaluated array
-    # There are 5 unique condition classes, 10 road classes which defines the math below
-    def get_work_evalauted_index(self, iSurfaceType, iRoadClass, iConditionClass):
-        return (iSurfaceType - 1) * 50 + (iRoadClass - 1) * 5 + iConditionClass - 1
+    def evaluate_chunk(self, inputs, alternatives=True):
+        """
+        Annual traffic, ESA loading and the evaluate_alternatives_batch results for the section arrays of a chunk, None
+        for the latter without alternatives
+        """
+        iSurfaceType = inputs["surface_type"]
+        iRoadClass = inputs["road_class"]
+        iConditionClass = inputs["condition_class"]
 
-    def compute_alternatives(self, iSurfaceType, iRoadClass, iConditionClass):
-        iNoAlernatives = 0
-        dAlternatives = np.zeros((13, 2), dtype=np.float64)
+        dAADT = self.traffic.project(inputs["aadt"][:, 0:12], inputs["traffic_growth"])
+        dESATotal = self.compute_esa_loading(dAADT, inputs["lanes"])
+        if not alternatives:
+            return dAADT, dESATotal, None
+
+        iNoAlernatives, dAlternatives = self.compute_alternatives_batch(iSurfaceType, iRoadClass, iConditionClass)
+        dCostFactor = self.compute_cost_factor(iSurfaceType, iRoadClass, iConditionClass)
 
-        # Get initial road work for the 13 alternatives
-        work_index = self.get_work_evalauted_index(iSurfaceType, iRoadClass, iConditionClass)
-        work_year, road_work_number, alt_1, alt_2, _unit_cost_mult = self.dWorkEvaluated[work_index]
+        evaluated = self.evaluate_alternatives_batch(
+            inputs, iNoAlernatives, dAlternatives, dCostFactor, dAADT, dESATotal
+        )
+        return dAADT, dESATotal, evaluated
+
+    def compute_top_alternatives(self, sections: List[Section], k=5, chunk_size=1024):
+        """
+        The k alternatives with the highest NPV of every section, best first (ties broken as in select_alternatives,
+        so the first is the one compute_cba_for_sections selects). Returns orma_way_id and (sections, k) arrays of the
+        alternative number, work type, work year, work cost, NPV, NPV/cost and EIRR of each, padded with -1, "", 0 and
+        NaN where a section has fewer than k alternatives.
+        """
+        sections = [self.fill_defaults(section) for section in sections]
+        chunks = [
+            self.rank_chunk(self.get_section_arrays(sections[i : i + chunk_size]), k)
+            for i in range(0, max(len(sections), 1), chunk_size)
+        ]
+        return {key: np.concatenate([c[key] for c in chunks]) for key in chunks[0]}
+
+    def rank_chunk(self, inputs, k):
+        _, _, evaluated = self.evaluate_chunk(inputs)
+        dSolNPV = evaluated["dSolNPV"]
+        iNoSections, iNoAlternatives = dSolNPV.shape
+
+        # Descending NPV, the last alternative first among equal ones
+        npv = np.where(evaluated["evaluated"] & ~np.isnan(dSolNPV), dSolNPV, -np.inf)
+        ranked = iNoAlternatives - 1 - np.argsort(-npv[:, ::-1], axis=1, kind="stable")
+        ranked = np.concatenate([ranked, np.zeros((iNoSections, max(k - iNoAlternatives, 0)), dtype=ranked.dtype)], 1)
+        ranked = ranked[:, 0:k]
+        valid = np.take_along_axis(evaluated["evaluated"], ranked, axis=1) & (np.arange(k) < iNoAlternatives)
+
+        def pick(name, fill):
+            return np.where(valid, np.take_along_axis(evaluated[name], ranked, axis=1), fill)
+
+        iSolYear = pick("iSolYear", 0)
+        work_no = np.where(iSolYear > 0, pick("work_idx", -1) + 1, 0)
+        rows = np.arange(iNoSections)[:, np.newaxis]
+        return {
+            "orma_way_id": inputs["orma_way_id"],
+            "alternative": np.where(valid, ranked, -1),
+            "work_type": self.works.decode("code", work_no),
+            "work_year": iSolYear,
+            "work_cost": pick("dSolCost", 0.0),
+            "npv": pick("dSolNPV", np.nan),
+            "npv_cost": pick("dSolNPVCost", np.nan),
+            "eirr": np.where(valid, irr(evaluated["dNetTotal"][rows, ranked]), np.nan),
+        }
 
-        dAlternatives[0, 0] = road_work_number
-        dAlternatives[1:7, 0] = alt_1
-        dAlternatives[7:13, 0] = alt_2
+    def evaluate_alternatives_batch(self, inputs, iNoAlernatives, dAlternatives, dCostFactor, dAADT, dESATotal):
+        """
+        Evaluates all alternatives of all sections at once as (sections, alternatives, years) arrays. With the numpy
+        backend roughness is computed in closed form (see deterioration) and only stepped year by year for HDM-4
+        surfaces, the numba backend compiles the year by year recurrence (see jit). All costs are then computed over the
+        whole grid in one go. The numpy backend produces exactly the same numbers as evaluate_alternatives_loop.
 
-        # Define years of initial works for 13 alternatives
-        dAlternatives[0, 1] = work_year
+        The cost grids are of the model's dtype, the net benefits and everything derived from them are float64.
+        """
+        dtype = self.dtype
+        dLength = inputs["length"][:, np.newaxis, np.newaxis].astype(dtype)
+        iTerrain = inputs["terrain"]
+        iSurfaceType = inputs["surface_type"]
+        temperature = inputs["temperature"][:, np.newaxis]
+        moisture = inputs["moisture"][:, np.newaxis]
 
-        if dAlternatives[1, 0] > 0:  # first road work defined: evaluate at least 7 alternatives
-            dAlternatives[1:7, 1] = [1, 2, 3, 4, 5, 6]
-            iNoAlernatives = 7
+        work_idx = dAlternatives[:, :, 0].astype(np.int64) - 1
+        work_year = dAlternatives[:, :, 1].astype(np.int64)
+        repair_idx = self.works["repair"][work_idx] - 1
 
-        if dAlternatives[7, 0] > 0:  # second road work defined: evaluate 13 alternatives
-            dAlternatives[7:13, 1] = [1, 2, 3, 4, 5, 6]
-            iNoAlernatives = 13
+        schedule = self.get_work_evalauted_index(iSurfaceType, inputs["road_class"], inputs["condition_class"])
+        is_work, is_repair = self.schedules.is_work[schedule], self.schedules.is_repair[schedule]
 
-        if dAlternatives[1, 0] == 0 and dAlternatives[7, 0] == 0:  # no road works defined: evaluate 2 base alternatives
-            dAlternatives[1, 0] = road_work_number
-            dAlternatives[1, 1] = work_year
-            iNoAlernatives = 2
+        ####################################################
+        # Pavement state and roughness, all sections and alternatives at once
+        ####################################################
+        moisture_coeff = self.dm_coeff[temperature - 1, moisture - 1][:, :, np.newaxis]
+        if self.backend == "numba":
+            from roads_cba_py import jit
+
+            iCondLanes, dCondWidth, iCondSurface, dCondSNC, dCondIRI = jit.pavement_recurrence(
+                inputs,
+                moisture_coeff[:, 0, 0],
+                dESATotal,
+                work_idx,
+                repair_idx,
+                is_work,
+                is_repair,
+                self.works,
+                self.dRoadDet,
+            )
+        else:
+            iCondLanes, dCondWidth, iCondSurface, dCondSNC, dCondIRI = self.compute_pavement_numpy(
+                inputs, moisture_coeff, dESATotal, work_idx, repair_idx, is_work, is_repair
+            )
 
-        return iNoAlernatives, dAlternatives
+        ####################################################
+        # Costs over the whole (sections, alternatives, years) grid
+        ####################################################
+        unit_costs = self.works.unit_costs.astype(dtype)
+        unit_cost = unit_costs[work_idx, iTerrain[:, np.newaxis] - 1][:, :, np.newaxis]
+        repair_unit_cost = unit_costs[repair_idx, iTerrain[:, np.newaxis] - 1][:, :, np.newaxis]
+        dCostFactor = dCostFactor.astype(dtype)[:, np.newaxis, np.newaxis]
+        dCondWidth = dCondWidth.astype(dtype)
+
+        dCostCapitalFin = np.where(is_work, unit_cost * dLength * dCondWidth / 1000.0 * dCostFactor, dtype.type(0))
+        dCostCapitalEco = dCostCapitalFin * self.dEconomic_Factor
+        dCostRepairFin = np.where(is_repair, repair_unit_cost * dLength * dCondWidth / 1000.0, dtype.type(0))
+        dCostRepairEco = dCostRepairFin * self.dEconomic_Factor
+
+        # Pavement Condition Class function of rougness
+        dCondCON = cc_from_iri_lu(iSurfaceType[:, np.newaxis, np.newaxis], dCondIRI).astype(np.int16)
+
+        recurrent = self.dRecurrent.astype(dtype)[iCondSurface - 1, iCondLanes - 1]
+        multiplier = dRecMult.astype(dtype)[dCondCON - 1]
+        dCostRecurrentFin = recurrent * dLength / 1000000.0 * multiplier
+        dCostRecurrentEco = recurrent * dLength * self.dEconomic_Factor / 1000000.0 * multiplier
+
+        dCostAgencyEco = dCostCapitalEco + dCostRepairEco + dCostRecurrentEco
+
+        # VOC, speed and travel time
+        dCostVOC, dCondSpeed, dCondSpeedAve, dCostTime = user_costs(
+            dCondIRI.astype(dtype),
+            iCondLanes,
+            iTerrain[:, np.newaxis, np.newaxis],
+            np.swapaxes(dAADT[:, np.newaxis, 0:12, :], -1, -2).astype(dtype),
+            dLength,
+            self.dVOC.astype(dtype),
+            self.dSPEED.astype(dtype),
+            self.dVehicleFleet.astype(dtype),
+        )
+
+        # Users and Total
+        dCostUsers = dCostVOC + dCostTime
+        dCostTotal = dCostAgencyEco + dCostUsers
+
+        # Net Benefits
+        dNetTotal = dCostTotal[:, 0:1, :].astype(np.float64) - dCostTotal
+
+        # NPV: accumulated year by year (not summed pairwise) to match the reference engine exactly
+        discount = np.array([(1 + self.dDiscount_Rate) ** iy for iy in range(self.horizon)], dtype=np.float64)
+        dSolNPV = np.cumsum(dNetTotal / discount, axis=2)[:, :, -1]
+        dSolNPVKm = dSolNPV / inputs["length"][:, np.newaxis]
+
+        dSolCost = dCostCapitalFin.sum(axis=2, dtype=np.float64)
+        dSolCostkm = dSolCost / inputs["length"][:, np.newaxis]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dSolNPVCost = np.where(dSolCost > 0, dSolNPV / dSolCost, 0.0)
+
+        iSolYear = np.where(work_year <= self.horizon, work_year, 0)
+        evaluated = np.arange(dAlternatives.shape[1]) < iNoAlernatives[:, np.newaxis]
+
+        return {
+            "iTheSelected": self.select_alternatives(dSolNPV, evaluated),
+            "evaluated": evaluated,
+            "work_idx": work_idx,
+            "dSolCost": dSolCost,
+            "dSolCostkm": dSolCostkm,
+            "iSolYear": iSolYear,
+            "dSolNPV": dSolNPV,
+            "dSolNPVKm": dSolNPVKm,
+            "dSolNPVCost": dSolNPVCost,
+            "dNetTotal": dNetTotal,
+            "dCondIRI": dCondIRI,
+            "dCondCON": dCondCON,
+            "dCostRecurrentFin": dCostRecurrentFin,
+        }
+
+    @staticmethod
+    def select_alternatives(dSolNPV, evaluated):
+        """
+        For each section, the last evaluated alternative with the highest non-negative NPV, falling back to
+        alternative 1 when there is none (as the loop does)
+        """
+        npv = np.where(evaluated & ~np.isnan(dSolNPV), dSolNPV, -np.inf)
+        dNPVMax = npv.max(axis=1)
+        last_max = npv.shape[1] - 1 - np.argmax((npv == dNPVMax[:, np.newaxis])[:, ::-1], axis=1)
+        return np.where(dNPVMax >= 0.0, last_max, 1)
+
+    def compute_alternatives_batch(self, iSurfaceType, iRoadClass, iConditionClass):
+        """
+        compute_alternatives over arrays of sections, alternatives that are not evaluated repeat the base alternative
+        """
+        schedule = self.get_work_evalauted_index(iSurfaceType, iRoadClass, iConditionClass)
+        return self.schedules.count[schedule], self.schedules.alternatives[schedule]
+
+    # This converts the surface type, road class condition class into an index offset into the dWorkEvaluated array
+    # There are 5 unique condition classes, 10 road classes which defines the math below
+    def get_work_evalauted_index(self, iSurfaceType, iRoadClass, iConditionClass):
+        return (iSurfaceType - 1) * 50 + (iRoadClass - 1) * 5 + iConditionClass - 1
+
+    def compute_alternatives(self, iSurfaceType, iRoadClass, iConditionClass):
+        """
+        The number of alternatives to evaluate and their (work number, work year), from the precompiled schedules
+        """
+        schedule = self.get_work_evalauted_index(iSurfaceType, iRoadClass, iConditionClass)
+        return int(self.schedules.count[schedule]), self.schedules.alternatives[schedule].copy()
 
     def compute_cost_factor(self, iSurfaceType, iRoadClass, iConditionClass):
-        baz = iConditionClass - 1
-        return self.dWorkEvaluated[(iSurfaceType - 1) * 50 + (iRoadClass - 1) * 5 + baz, 4]
+        return self.schedules.cost_factor[self.get_work_evalauted_index(iSurfaceType, iRoadClass, iConditionClass)]
 
     def calculate_next_year_roughness(
         self, dYearRoughness, iYearAge, ia, iy, iTemperature, iMoisture, dCondSNC, dESATotal, iCondSurface
@@ -424,31 +912,141 @@ class CostBenefitAnalysisModel:
                 + (Kgm * moisture_coeff * dYearRoughness)
             )
 
-    def compute_annual_traffic(self, dAADT, iGrowthScenario):
+    def is_time_invariant(self, iSurfaceType, alt, repair_alt):
+        """
+        Whether roughness progresses the same whatever the year on every surface the alternative goes through, i.e.
+        whether none of them uses the HDM-4 equation, which depends on the traffic loading of the year
+        """
+        surfaces = [iSurfaceType] + [w["surface"] for w in (alt, repair_alt) if w["lanes_class"] > 0]
+        return all(s in (1, 4, 5, 6, 7) or self.dRoadDet[s - 1, 0] in (1.0, 3.0) for s in surfaces)
 
-        idx = iGrowthScenario - 1
-        growth_factor = 1.0 + self.dGrowth[idx : idx + 1, :]
+    def compute_pavement_numpy(self, inputs, moisture_coeff, dESATotal, work_idx, repair_idx, is_work, is_repair):
+        """
+        Lanes, width, surface type, SNC and roughness over the (sections, alternatives, years) grid: roughness in
+        closed form wherever the deterioration rate is constant, the year by year recurrence for the rest (HDM-4)
+        """
+        work_attributes = ("lanes_class", "width", "surface", "thickness", "strength", "snc", "iri")
+        work = {a: self.works[a][work_idx] for a in work_attributes}
+        repair = {a: self.works[a][repair_idx] for a in work_attributes}
+
+        iCondLanes, dCondWidth, iCondSurface, dCondSNC = deterioration.pavement_state(
+            inputs["lanes"][:, np.newaxis],
+            inputs["width"][:, np.newaxis],
+            inputs["surface_type"][:, np.newaxis],
+            inputs["structural_no"][:, np.newaxis],
+            is_work,
+            is_repair,
+            work,
+            repair,
+        )
+
+        is_reset = is_work | is_repair
+        reset_roughness = np.where(
+            is_repair, repair["iri"][:, :, np.newaxis], np.where(is_work, work["iri"][:, :, np.newaxis], np.nan)
+        )
+        rates = deterioration.constant_rates(iCondSurface, self.dRoadDet, moisture_coeff)
+        caps = deterioration.max_roughness(iCondSurface)
+
+        dCondIRI = deterioration.closed_form_roughness(
+            inputs["roughness"][:, np.newaxis], is_reset, reset_roughness, rates, caps
+        )
+        recursive = np.isnan(rates[:, :, 1:]).any(axis=2)
+        if recursive.any():
+            section_idx = np.nonzero(recursive)[0]
+            dCondIRI[recursive] = self.calculate_roughness_recursive(
+                inputs["roughness"][section_idx],
+                inputs["pavement_age"][section_idx],
+                iCondSurface[recursive],
+                dCondSNC[recursive],
+                inputs["temperature"][section_idx],
+                inputs["moisture"][section_idx],
+                dESATotal[section_idx],
+                is_reset[recursive],
+                reset_roughness[recursive],
+            )
 
-        # Use numpy cumumlative sum to calculate the growth into the next 20 years
-        dAADT[0:12, 1:20] = growth_factor.T
-        np.cumprod(dAADT[0:12, :], axis=1, out=dAADT[0:12, :])
+        return iCondLanes, dCondWidth, iCondSurface, dCondSNC, dCondIRI
+
+    def calculate_roughness_recursive(
+        self,
+        dRoughness,
+        iPavementAge,
+        iCondSurface,
+        dCondSNC,
+        iTemperature,
+        iMoisture,
+        dESATotal,
+        is_reset,
+        reset_roughness,
+    ):
+        """
+        Roughness for every year, stepping calculate_next_year_roughness over an array of alternatives. Arguments
+        are (alternatives,) arrays or (alternatives, years) grids.
+        """
+        dCondIRI = np.zeros(iCondSurface.shape, dtype=np.float64)
+        dYearRoughness = np.asarray(dRoughness, dtype=np.float64)
+        iYearAge = np.asarray(iPavementAge, dtype=np.int64)
+
+        for iy in range(iCondSurface.shape[-1]):
+            if iy > 0:
+                dYearRoughness = self.calculate_next_year_roughness_vectorized(
+                    dYearRoughness,
+                    iYearAge,
+                    iCondSurface[:, iy],
+                    dCondSNC[:, iy],
+                    iTemperature,
+                    iMoisture,
+                    dESATotal[:, iy],
+                )
+                dYearRoughness = deterioration.cap_roughness(
+                    dYearRoughness, deterioration.max_roughness(iCondSurface[:, iy])
+                )
 
-        # Calculate the total AADT over all the vehicle classes
-        dAADT[12, :].fill(0)
-        dAADT[12, :] = dAADT.sum(axis=0)
+            iYearAge = iYearAge + 1
+            dYearRoughness = np.where(is_reset[:, iy], reset_roughness[:, iy], dYearRoughness)
+            iYearAge = np.where(is_reset[:, iy], 1, iYearAge)
+            dCondIRI[:, iy] = dYearRoughness
+
+        return dCondIRI
+
+    def calculate_next_year_roughness_vectorized(
+        self, dYearRoughness, iYearAge, iYearSurface, dYearSNC, iTemperature, iMoisture, dYearESA
+    ):
+        """
+        Rougnesss progression over an array of alternatives, see calculate_next_year_roughness
+        """
+        foo, const, Kgp, Kgm, a0, a1, a2 = np.moveaxis(self.dRoadDet[iYearSurface - 1, 0:7], -1, 0)
+        moisture_coeff = self.dm_coeff[iTemperature - 1, iMoisture - 1]
+
+        constant = np.isin(iYearSurface, (1, 4, 5, 6, 7)) | (foo == float(1))
+        climate = foo == float(3)
+        hdm4 = dYearRoughness + (
+            Kgp
+            * (
+                a0 * np.exp(Kgm * moisture_coeff * iYearAge) * np.power((1 + dYearSNC * a1), -5) * dYearESA
+                + a2 * iYearAge
+            )
+            + (Kgm * moisture_coeff * dYearRoughness)
+        )
+        return np.where(
+            constant, dYearRoughness * (1 + const), np.where(climate, dYearRoughness * (1 + moisture_coeff), hdm4)
+        )
 
-        return dAADT
+    def compute_annual_traffic(self, dAADT, iGrowthScenario):
+        """
+        dAADT is (13, years) for a single section or (sections, 13, years) for a batch, with the base year traffic in the
+        first column. It is grown in place with the growth factors of the scenario (see traffic).
+        """
+        return self.traffic.project_into(dAADT, dAADT[..., 0:12, 0], iGrowthScenario)
 
     def compute_esa_loading(self, dAADT, iLanes):
-        annualisation_factor = 365 / 1000000 / self.dWidthDefaults[iLanes - 1, 1]
-        # calculate the sumproduct of traffic volumes with their equivalent standard axle weightings
-        return np.sum(dAADT[0:12, :] * self.dVehicleFleet[0:12, 0:1], axis=0) * annualisation_factor
+        return self.traffic.esa_loading(dAADT, iLanes)
 
     def compute_trucks_percent(self, dAADT):
-        return np.sum(dAADT[5:9, 0]) / dAADT[12, 0]
+        return np.sum(dAADT[..., 5:9, 0], axis=-1) / dAADT[..., 12, 0]
 
     def compute_vehicle_utilization(self, dAADT, dLength):
-        return dAADT[12, 0] * dLength * 365 / 1000000
+        return dAADT[..., 12, 0] * dLength * 365 / 1000000
 
     def fill_defaults(self, section: Section) -> Section:
         if section.road_type == 0 and section.surface_type == 0:
@@ -514,5 +1112,113 @@ class CostBenefitAnalysisModel:
 
         return section
 
+    def fill_defaults_batch(self, batch: SectionBatch):
+        """
+        fill_defaults over a whole SectionBatch: returns a filled copy and an array with an error code (see
+        FILL_ERRORS) for every section instead of raising on the first invalid one. Each section gets the code of the
+        first rule it fails and is left as filled up to there, sections with code FILLED are exactly what
+        fill_defaults makes of them. Classes the model tables can't look up, such as a terrain of 0 or 4, get
+        OUT_OF_RANGE rather than indexing another row.
+        """
+        c = {name: column.copy() for name, column in batch.columns.items()}
+        errors = np.zeros(len(batch), dtype=np.int8)
+
+        def fail(code, mask):
+            errors[(errors == FILLED) & mask] = code
+
+        def rows(mask):
+            return (errors == FILLED) & mask
+
+        def index(values, size, offset=0):
+            """
+            values as indices into a table of size, with a mask of those which are valid
+            """
+            valid = np.isfinite(values) & (values == np.round(values)) & (values + offset >= 0)
+            valid &= values + offset < size
+            return np.where(valid, values + offset, 0).astype(np.int64), valid
+
+        # Surface type and road type
+        fail(NO_SURFACE_TYPE, (c["road_type"] == 0) & (c["surface_type"] == 0))
+        road_type, valid = index(c["road_type"], len(iSurfaceDefaults))
+        fill = rows(c["surface_type"] == 0)
+        fail(OUT_OF_RANGE, fill & ~valid)
+        fill = rows(fill)
+        c["surface_type"][fill] = iSurfaceDefaults[road_type[fill]]
+        fill = rows(c["road_type"] == 0)
+        c["road_type"][fill] = np.where(np.isin(c["surface_type"][fill], (4, 5)), 2, 1)
+
+        # Width and Number of Lanes Class
+        fail(NO_WIDTH, (c["width"] == 0) & (c["lanes"] == 0))
+        lanes, valid = index(c["lanes"], len(dWidthDefaults), -1)
+        fill = rows(c["width"] == 0)
+        fail(OUT_OF_RANGE, fill & ~valid)
+        fill = rows(fill)
+        c["width"][fill] = dWidthDefaults[lanes[fill], 1]
+        default_lanes, valid = lanes_lu.find(c["width"])
+        fill = rows(c["lanes"] == 0)
+        fail(OUT_OF_RANGE, fill & ~valid)
+        fill = rows(fill)
+        c["lanes"][fill] = default_lanes[fill]
+
+        # Roughness, Pavement Age and Road Condition
+        fail(NO_CONDITION, (c["roughness"] == 0) & (c["condition_class"] == 0))
+        surface, valid_surface = index(c["surface_type"], dConditionData.shape[0], -1)
+        condition_class, valid = cc_from_iri_lu.find(np.where(valid_surface, c["surface_type"], 0), c["roughness"])
+        fill = rows(c["condition_class"] == 0)
+        fail(OUT_OF_RANGE, fill & ~valid)
+        fill = rows(fill)
+        c["condition_class"][fill] = condition_class[fill]
+        condition_class, valid = index(c["condition_class"], dConditionData.shape[1], -1)
+        fail(OUT_OF_RANGE, ~(valid_surface & valid))
+        roughness, pavement_age = dConditionData[surface, condition_class].T
+        fill = rows(c["roughness"] == 0)
+        c["roughness"][fill] = roughness[fill]
+        fill = rows(c["pavement_age"] == 0)
+        c["pavement_age"][fill] = pavement_age[fill]
+
+        # Traffic Level and Traffic Data
+        fail(NO_TRAFFIC, (c["traffic_level"] == 0) & (c["aadt_total"] == 0))
+        fail(NO_TRAFFIC_LEVEL, np.isnan(c["traffic_level"]))
+        traffic_level, valid = index(c["traffic_level"], len(dTrafficLevels), -1)
+        fill = rows(c["aadt_total"] == 0)
+        fail(OUT_OF_RANGE, fill & ~valid)
+        fill = rows(fill)
+        c["aadt_total"][fill] = dTrafficLevels[traffic_level[fill], 0]
+        proportions = dTrafficLevels[traffic_level[fill], 1:13]
+        for i, name in enumerate(AADT_FIELDS):
+            c[name][fill] = proportions[:, i] * c["aadt_total"][fill]
+
+        # Summed one class after the other, as sum() does
+        calc_aadt_total = 0
+        for name in AADT_FIELDS:
+            calc_aadt_total = calc_aadt_total + c[name]
+        fail(AADT_MISMATCH, calc_aadt_total != c["aadt_total"])
+
+        traffic_range, valid = traffic_range_lu.find(c["aadt_total"])
+        fill = rows(c["traffic_level"] == 0)
+        fail(OUT_OF_RANGE, fill & ~valid)
+        fill = rows(fill)
+        c["traffic_level"][fill] = traffic_range[fill]
+        c["traffic_growth"][rows(c["traffic_growth"] == 0)] = 1
+
+        fill = rows((c["structural_no"] == 0) & (c["surface_type"] < 4))
+        fail(NO_STRUCTURAL_NO, fill & (c["traffic_level"] > 14))
+        fill = rows(fill)
+        traffic_level, _ = index(c["traffic_level"], len(dTrafficLevels))
+        c["structural_no"][fill] = dTrafficLevels[traffic_level[fill], 12 + condition_class[fill] + 1]
+
+        # Classes the model looks up in its tables, given or filled, from 1 to the size of the tables
+        for name, size in [
+            ("lanes", min(len(self.dWidthDefaults), self.dVOC.shape[0])),
+            ("traffic_growth", len(self.dGrowth)),
+            ("terrain", self.dVOC.shape[1]),
+            ("temperature", self.dm_coeff.shape[0]),
+            ("moisture", self.dm_coeff.shape[1]),
+            ("road_class", ROWS_PER_SURFACE // dConditionData.shape[1]),
+        ]:
+            fail(OUT_OF_RANGE, ~index(c[name], size, -1)[1])
+
+        return SectionBatch(c), errors
+
     def get_default_lanes(self, width):
         return lanes_lu(width)
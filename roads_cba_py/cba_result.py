@@ -1,15 +1,29 @@
 import json
 
+import numpy as np
 from numpy import isnan
 from schematics import Model
+from schematics.exceptions import ValidationError
 from schematics.types import StringType, FloatType, ListType
 
+# The per year projections, one value for every year of the analysis horizon
+SERIES_FIELDS = (
+    "aadt",
+    "iri_projection",
+    "iri_base",
+    "con_projection",
+    "con_base",
+    "financial_recurrent_cost",
+    "net_benefits",
+)
+
 
 class CbaResult(Model):
     orma_way_id = StringType(max_length=20, min_length=1)
-    work_class = StringType(required=True, min_length=1)
-    work_type = StringType(required=True, min_length=1)
-    work_name = StringType(required=True, min_length=1)
+    # Empty when no work falls within the horizon
+    work_class = StringType(required=True)
+    work_type = StringType(required=True)
+    work_name = StringType(required=True)
     work_cost = FloatType(required=True)
     work_cost_km = FloatType(required=True)
     work_year = FloatType(required=True)
@@ -17,20 +31,33 @@ class CbaResult(Model):
     npv_km = FloatType(required=True)
     npv_cost = FloatType(required=True)
     eirr = FloatType(required=True)
-    aadt = ListType(FloatType, required=True, min_size=20, max_size=20)
+    aadt = ListType(FloatType, required=True)
     truck_percent = FloatType(required=True)
     vehicle_utilization = FloatType(required=True)
     esa_loading = FloatType(required=True)
-    iri_projection = ListType(FloatType, required=True, min_size=20, max_size=20)
-    iri_base = ListType(FloatType, required=True, min_size=20, max_size=20)
-    con_projection = ListType(FloatType, required=True, min_size=20, max_size=20)
-    con_base = ListType(FloatType, required=True, min_size=20, max_size=20)
-    financial_recurrent_cost = ListType(FloatType, required=True, min_size=20, max_size=20)
-    net_benefits = ListType(FloatType, required=True, min_size=20, max_size=20)
+    iri_projection = ListType(FloatType, required=True)
+    iri_base = ListType(FloatType, required=True)
+    con_projection = ListType(FloatType, required=True)
+    con_base = ListType(FloatType, required=True)
+    financial_recurrent_cost = ListType(FloatType, required=True)
+    net_benefits = ListType(FloatType, required=True)
 
     def __repr__(self):
         return str(self.to_primitive())
 
+    def validate_net_benefits(self, data, value):
+        """
+        The horizon is a parameter of the model, but all projections of a result must span the same one
+        """
+        lengths = {k: len(data[k]) for k in SERIES_FIELDS if data.get(k) is not None}
+        if len(set(lengths.values())) > 1:
+            raise ValidationError(f"Projections span different horizons: {lengths}")
+        return value
+
+    @property
+    def horizon(self):
+        return len(self.net_benefits)
+
     @classmethod
     def from_file(cls, filename):
         with open(filename) as f:
@@ -85,3 +112,73 @@ class CbaResult(Model):
 
         keys = set.intersection(set(a.keys()), set(b.keys()))
         return {k: comparison(a[k], b[k]) for k in sorted(list(keys))}
+
+
+# The fields most network screening runs need, for the fields argument of the CostBenefitAnalysisModel
+SUMMARY_FIELDS = ("work_type", "work_year", "work_cost", "npv", "npv_cost", "eirr")
+
+# The fields that only depend on the traffic projection. All others depend on the selected alternative, for which every
+# alternative has to be evaluated with all its costs, user costs included.
+TRAFFIC_FIELDS = ("orma_way_id", "aadt", "truck_percent", "vehicle_utilization", "esa_loading")
+
+
+def result_fields(fields=None):
+    """
+    The CbaResult fields to compute: all of them by default, otherwise the requested ones and always orma_way_id
+    """
+    if fields is None:
+        return tuple(CbaResult.fields)
+    unknown = set(fields) - set(CbaResult.fields)
+    if unknown:
+        raise ValueError(f"Unknown result fields {sorted(unknown)}, expected some of {list(CbaResult.fields)}")
+    return tuple(f for f in CbaResult.fields if f == "orma_way_id" or f in fields)
+
+
+def needs_alternatives(fields):
+    return any(f not in TRAFFIC_FIELDS for f in result_fields(fields))
+
+
+def project(row, fields):
+    return {k: row[k] for k in fields}
+
+
+class CbaResultBatch(object):
+    """
+    Columnar results for a batch of sections: one numpy array per CbaResult field with sections along the first axis
+    (and years along the second for the projections). CbaResult objects are only built when asked for.
+    """
+
+    def __init__(self, columns):
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.columns["orma_way_id"])
+
+    def __getitem__(self, i) -> CbaResult:
+        return CbaResultBatch.to_result(self.row(i))
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def row(self, i):
+        return {k: v[i] for k, v in self.columns.items()}
+
+    @staticmethod
+    def to_result(row) -> CbaResult:
+        return CbaResult({k: CbaResultBatch.to_python(v) for k, v in row.items()})
+
+    @staticmethod
+    def to_python(value):
+        return value.tolist() if isinstance(value, (np.ndarray, np.generic)) else value
+
+    @classmethod
+    def from_rows(cls, rows):
+        keys = rows[0].keys()
+        return CbaResultBatch(
+            {k: np.array([r[k] for r in rows], dtype=object if k == "orma_way_id" else None) for k in keys}
+        )
+
+    @classmethod
+    def concatenate(cls, batches):
+        keys = batches[0].columns.keys()
+        return CbaResultBatch({k: np.concatenate([b.columns[k] for b in batches]) for k in keys})
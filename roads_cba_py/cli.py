@@ -0,0 +1,177 @@
+"""
+The roads-cba command: reads sections as JSON Lines from a file or stdin and writes a CbaResult per line to stdout or a
+file, chunk by chunk as they are computed, so that memory use doesn't grow with the size of the input. Sections that
+can't be read, don't validate, break a rule of Section.invalid_reason or can't be filled or computed go to a separate
+error stream, one line each with their line number, orma_way_id and errors.
+"""
+
+import argparse
+import json
+import sys
+from itertools import islice
+from math import isnan
+
+from schematics.exceptions import DataError
+from schematics.types import StringType
+
+from roads_cba_py.cba import CostBenefitAnalysisModel, FILL_ERRORS, FILLED
+from roads_cba_py.cba_result import result_fields, project
+from roads_cba_py.section import InvalidSection, Section, parse_section
+from roads_cba_py.section_batch import SectionBatch
+
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog="roads-cba", description=__doc__.strip().split("\n\n")[0])
+    parser.add_argument("input", nargs="?", default="-", help="JSON Lines file of sections, - for stdin (default)")
+    parser.add_argument("-o", "--output", default="-", help="JSON Lines file for the results, - for stdout (default)")
+    parser.add_argument(
+        "-e", "--errors", default=None, help="JSON Lines file for the invalid sections (default stderr)"
+    )
+    parser.add_argument(
+        "--chunk-size", type=positive_int, default=1024, help="Sections computed at a time (default 1024)"
+    )
+    parser.add_argument("--fields", default=None, help="Comma separated CbaResult fields to write (default all)")
+    return parser.parse_args(argv)
+
+
+def open_stream(filename, mode, default):
+    return default if filename in (None, "-") else open(filename, mode)
+
+
+def read_chunks(lines, chunk_size):
+    """
+    (line number, line) of the non blank lines, chunk_size at a time
+    """
+    numbered = ((i, line) for i, line in enumerate(lines, start=1) if line.strip())
+    while True:
+        chunk = list(islice(numbered, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def parse_line(line):
+    """
+    The Section of a line, or the data of the line and its errors: those of parse_section, else those of
+    Section.validate (required fields, lengths and ranges), else those of the rules of Section.invalid_reason
+    """
+    try:
+        data = json.loads(line)
+    except ValueError as err:
+        return None, line, [f"Invalid JSON: {err}"]
+    if not isinstance(data, dict):
+        return None, line, ["Expected a JSON object"]
+    section = parse_section(data)
+    if isinstance(section, InvalidSection):
+        return None, data, section.invalid_reason()
+    try:
+        section.validate()
+    except DataError as err:
+        # Extracts leave optional names and locations empty rather than out, these are missing rather than too short
+        errors = {k: v for k, v in err.errors.items() if not is_blank(data, k)}
+        if errors:
+            return None, data, InvalidSection(errors, data).invalid_reason()
+        # validate drops the fields it rejects
+        for name in err.errors:
+            section[name] = data[name]
+    reason = section.invalid_reason()
+    if reason:
+        return None, data, reason
+    return section, data, None
+
+
+def run_chunk(model, chunk, fields):
+    """
+    The result rows and the error rows of a chunk of (line number, line)
+    """
+    parsed = [(i,) + parse_line(line) for i, line in chunk]
+    errors = [error_row(i, data, reason) for i, section, data, reason in parsed if section is None]
+    valid = [(i, section, data) for i, section, data, _ in parsed if section is not None]
+    if not valid:
+        return [], errors
+
+    results, failed = compute_rows(model, valid, fields)
+    return results, sorted(errors + failed, key=lambda row: row["line"])
+
+
+def compute_rows(model, valid, fields):
+    """
+    The result rows and the error rows of (line number, section, data). If computing them together fails, they are
+    computed again one at a time so that only the sections that fail go to the errors.
+    """
+    try:
+        batch = SectionBatch.from_sections([s for _, s, _ in valid])
+        results, codes = model.compute_cba_for_batch(batch, fields=fields)
+    except Exception as err:
+        if len(valid) == 1:
+            i, _, data = valid[0]
+            return [], [error_row(i, data, [f"Computation failed: {err}"])]
+        computed = [compute_rows(model, [row], fields) for row in valid]
+        return [r for rows, _ in computed for r in rows], [e for _, rows in computed for e in rows]
+
+    errors = [error_row(i, data, [FILL_ERRORS[code]]) for (i, _, data), code in zip(valid, codes) if code != FILLED]
+    return [project(results[i].to_primitive(), results.columns) for i in range(len(results))], errors
+
+
+def is_blank(data, name):
+    field = Section.fields.get(name)
+    return isinstance(field, StringType) and not field.required and data.get(name) == ""
+
+
+def error_row(line, data, errors):
+    orma_way_id = data.get("orma_way_id") if isinstance(data, dict) else None
+    return {"line": line, "orma_way_id": orma_way_id, "errors": errors}
+
+
+def json_value(value):
+    """
+    NaN (such as a missing EIRR) as None, JSON has no NaN
+    """
+    if isinstance(value, float) and isnan(value):
+        return None
+    if isinstance(value, list):
+        return [json_value(v) for v in value]
+    return value
+
+
+def write_rows(stream, rows):
+    for row in rows:
+        stream.write(json.dumps({k: json_value(v) for k, v in row.items()}, allow_nan=False))
+        stream.write("\n")
+    stream.flush()
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    fields = args.fields.split(",") if args.fields else None
+    try:
+        result_fields(fields)
+    except ValueError as err:
+        print(f"roads-cba: {err}", file=sys.stderr)
+        return 2
+    model = CostBenefitAnalysisModel()
+
+    source = open_stream(args.input, "r", sys.stdin)
+    output = open_stream(args.output, "w", sys.stdout)
+    errors = open_stream(args.errors, "w", sys.stderr)
+    try:
+        for chunk in read_chunks(source, args.chunk_size):
+            results, invalid = run_chunk(model, chunk, fields)
+            write_rows(output, results)
+            write_rows(errors, invalid)
+    finally:
+        for stream, default in [(source, sys.stdin), (output, sys.stdout), (errors, sys.stderr)]:
+            if stream is not default:
+                stream.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
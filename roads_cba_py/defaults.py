@@ -4,9 +4,10 @@ These values are recommended in the original Excel CBA
 
 DANGEROUS: Do not change these values if you're not sure how to change them
 """
+from bisect import bisect_right
+
 import numpy as np
 import pandas as pd
-from intervaltree import IntervalTree
 
 dDiscount_Rate = 0.12
 dEconomic_Factor = 0.91
@@ -326,6 +327,53 @@ dRoadWorks = [
 alternatives = [MaintenanceAlternative(i, arr) for i, arr in enumerate(dRoadWorks)]
 
 
+class WorkCatalogue(object):
+    """
+    dRoadWorks compiled into arrays indexed by work number - 1, so that the engines only carry integer work numbers
+    (0 meaning no work). The numeric attributes are a structured table with missing values as 0, the unit costs a
+    (work, terrain - 1) matrix, and the names and codes are only decoded when results are built.
+    """
+
+    dtype = np.dtype(
+        [
+            ("iri", np.float64),
+            ("lanes_class", np.int16),
+            ("width", np.float64),
+            ("surface", np.int16),
+            ("thickness", np.float64),
+            ("strength", np.float64),
+            ("snc", np.float64),
+            ("repair", np.int16),
+            ("repair_period", np.int16),
+        ]
+    )
+
+    def __init__(self, road_works):
+        self.table = np.array([tuple(v or 0 for v in w[6:]) for w in road_works], dtype=self.dtype)
+        self.unit_costs = np.array([w[3:6] for w in road_works], dtype=np.float64)
+        # Labels by work number, with "" for 0 (no work)
+        self.labels = {
+            "name": np.array([""] + [w[0] for w in road_works], dtype=object),
+            "code": np.array([""] + [w[1] for w in road_works], dtype=object),
+            "work_class": np.array([""] + [w[2] for w in road_works], dtype=object),
+        }
+
+    def __len__(self):
+        return len(self.table)
+
+    def __getitem__(self, column):
+        return self.table[column]
+
+    def decode(self, label, work_no):
+        """
+        The name, code or work_class of work numbers (scalar or array)
+        """
+        return self.labels[label][work_no]
+
+
+work_catalogue = WorkCatalogue(dRoadWorks)
+
+
 def f(row, number):
     (
         name,
@@ -3362,35 +3410,100 @@ iri_cc_df = pd.DataFrame(data=iri_cc, columns=["SurfaceType", "RoughnessFrom", "
 iri_cc_df[["SurfaceType", "ConditionCategory"]] = iri_cc_df[["SurfaceType", "ConditionCategory"]].astype(int)
 
 
-def default_range(data):
-    # from intervaltree import Interval, IntervalTree
-    t = IntervalTree()
-    for (l, u, v) in data:
-        t[l:u] = v
+class RangeLookup(object):
+    """
+    Looks up the value of the [lower inclusive, upper exclusive) bucket containing a number, for a single number or
+    a whole numpy array at once. Raises a ValueError for numbers which don't fall into any bucket.
+    """
 
-    def lu(v):
-        e = None
-        for e in t[v]:
-            break
-        if e is None:
-            print(v)
-            print(t)
-            raise ValueError(f"couldn't find a lookup for {v} in {t}")
-        return e.data
+    def __init__(self, data):
+        data = sorted(data, key=lambda row: row[0])
+        self.lower = np.array([l for (l, u, v) in data], dtype=np.float64)
+        self.upper = np.array([u for (l, u, v) in data], dtype=np.float64)
+        self.values = np.array([v for (l, u, v) in data])
+        self.lower_list = self.lower.tolist()
+        self.upper_list = self.upper.tolist()
+        self.values_list = self.values.tolist()
 
-    return lu
+    def __call__(self, v):
+        if np.ndim(v) == 0:
+            # plain python is a lot quicker than numpy for a single value
+            i = bisect_right(self.lower_list, v) - 1
+            if i < 0 or not v < self.upper_list[i]:
+                raise ValueError(f"couldn't find a lookup for {v} in {self}")
+            return self.values_list[i]
 
+        v = np.asarray(v, dtype=np.float64)
+        values, found = self.find(v)
+        if not found.all():
+            raise ValueError(f"couldn't find a lookup for {v[~found][0]} in {self}")
+        return values
 
-traffic_range_lu = default_range(traffic_ranges_data)
-lanes_lu = default_range(default_lanes)
+    def find(self, v):
+        """
+        The values for an array of numbers and a mask of the numbers which fall into a bucket, values where they
+        don't are meaningless
+        """
+        v = np.asarray(v, dtype=np.float64)
+        i = np.searchsorted(self.lower, v, side="right") - 1
+        found = (i >= 0) & (v < self.upper[np.maximum(i, 0)])
+        return self.values[np.maximum(i, 0)], found
+
+    def __repr__(self):
+        return str(list(zip(self.lower_list, self.upper_list, self.values_list)))
+
+
+class SurfaceRangeLookup(object):
+    """
+    RangeLookups keyed by surface type. lu[surface_type](v) looks up one surface type, lu(surface_types, vs) looks up
+    arrays of (broadcastable) surface types and values in one go.
+    """
+
+    def __init__(self, data):
+        surface_types = np.unique(data[:, 0]).astype(int)
+        self.by_surface = {s: RangeLookup(data[data[:, 0] == s, 1:]) for s in surface_types}
+
+        # Buckets padded to the same number per surface type, surface types without data never match
+        n_buckets = max(len(lu.lower) for lu in self.by_surface.values())
+        self.lower = np.full((surface_types.max() + 1, n_buckets), np.inf)
+        self.upper = np.full((surface_types.max() + 1, n_buckets), -np.inf)
+        self.values = np.zeros((surface_types.max() + 1, n_buckets), dtype=np.int64)
+        for s, lu in self.by_surface.items():
+            self.lower[s, : len(lu.lower)] = lu.lower
+            self.upper[s, : len(lu.upper)] = lu.upper
+            self.values[s, : len(lu.values)] = lu.values
 
+    def __getitem__(self, surface_type):
+        return self.by_surface[surface_type]
 
-def get_cc_from_iri_lu():
-    def f(surface_type):
-        data = np.squeeze(iri_cc[np.where(iri_cc[:, 0] == surface_type), 1:])
-        return default_range(data)
+    def __call__(self, surface_type, v):
+        values, found = self.find(surface_type, v)
+        if not found.all():
+            surface_type, v = np.broadcast_arrays(surface_type, v)
+            raise ValueError(f"couldn't find a lookup for {v[~found][0]} on surface type {surface_type[~found][0]}")
+        return values
 
-    return {i: f(i) for i in range(1, 8)}
+    def find(self, surface_type, v):
+        """
+        As RangeLookup.find, for arrays of surface types and values
+        """
+        surface_type, v = np.broadcast_arrays(np.asarray(surface_type, dtype=np.int64), np.asarray(v, np.float64))
+        surface_type = np.where((surface_type >= 0) & (surface_type < len(self.lower)), surface_type, 0)
 
+        # lower bounds are sorted, so the bucket index is the number of lower bounds <= v
+        i = (v[..., np.newaxis] >= self.lower[surface_type]).sum(axis=-1) - 1
+        found = i >= 0
+        i = np.maximum(i, 0)
+        found &= v < np.take_along_axis(self.upper[surface_type], i[..., np.newaxis], axis=-1)[..., 0]
+        return np.take_along_axis(self.values[surface_type], i[..., np.newaxis], axis=-1)[..., 0], found
+
+
+def default_range(data):
+    return RangeLookup(data)
+
+
+traffic_range_lu = default_range(traffic_ranges_data)
+lanes_lu = default_range(default_lanes)
 
-cc_from_iri_lu = get_cc_from_iri_lu()
+# Condition class from roughness for each surface type
+cc_from_iri_lu = SurfaceRangeLookup(iri_cc)
@@ -0,0 +1,110 @@
+"""
+Pavement state and roughness (IRI) trajectories computed for whole (..., years) grids at once, e.g. the
+(sections, alternatives, years) grid of the batched engine.
+
+Apart from the HDM-4 equation (FOO 2 in dRoadDet), roughness deteriorates at a constant rate c per year until it hits
+the cap of its surface type, and is reset by road works and repairs. Between two resets the trajectory is the
+geometric series V, V(1 + c), V(1 + c)^2, ... which is evaluated here with a cumulative product rather than a loop
+over years. The products are taken in the same order as the year by year recurrence, so the results are identical.
+"""
+
+import numpy as np
+
+# Surface types which always use the constant deterioration factor, whatever their FOO says
+CONSTANT_SURFACES = (1, 4, 5, 6, 7)
+
+
+def after(events):
+    """
+    True from the first year with an event onwards
+    """
+    return np.cumsum(events, axis=-1) > 0
+
+
+def pavement_state(lanes, width, surface, snc, is_work, is_repair, work, repair):
+    """
+    Lanes, width, surface type and structural number for every year. lanes, width, surface and snc are the initial
+    values (broadcastable to the grid without the year axis), work and repair map road work attributes ("lanes_class",
+    "width", "surface", "thickness", "strength", "snc") to arrays of the same shape.
+    """
+    shape = is_work.shape
+    after_work, after_repair = after(is_work), after(is_repair)
+
+    def expand(a):
+        return np.broadcast_to(np.asarray(a)[..., np.newaxis], shape)
+
+    def upgraded(initial, name):
+        value = np.where(after_work & expand(work["lanes_class"] > 0), expand(work[name]), expand(initial))
+        return np.where(after_repair & expand(repair["lanes_class"] > 0), expand(repair[name]), value)
+
+    iCondLanes = upgraded(lanes, "lanes_class").astype(np.int16)
+    dCondWidth = upgraded(width, "width").astype(np.float64)
+    iCondSurface = upgraded(surface, "surface").astype(np.int16)
+
+    # Structural number after periodic maintenance, rehabilitation and repairs
+    snc = np.asarray(snc, dtype=np.float64)
+    overlay = snc + work["thickness"] * work["strength"] * 0.0393701
+    dCondSNC = np.where(after_work & expand(work["thickness"] > 0), expand(overlay), expand(snc))
+    dCondSNC = np.where(after_work & expand(work["snc"] > 0), expand(work["snc"]), dCondSNC)
+    dCondSNC = np.where(after_repair & expand(repair["snc"] > 0), expand(repair["snc"]), dCondSNC)
+
+    return iCondLanes, dCondWidth, iCondSurface, dCondSNC
+
+
+def max_roughness(iCondSurface):
+    return np.where(np.isin(iCondSurface, (4, 5)), 25.0, 16.0)
+
+
+def cap_roughness(dRoughness, caps):
+    """
+    Same as min(caps, dRoughness) in the loop engine, which also caps a NaN roughness (e.g. from a missing SNC)
+    """
+    return np.where(dRoughness < caps, dRoughness, caps)
+
+
+def constant_rates(iCondSurface, dRoadDet, moisture_coeff):
+    """
+    The yearly deterioration rate c for each cell of the grid, NaN where the surface follows the HDM-4 equation (or
+    would improve over time, which the closed form doesn't handle)
+    """
+    foo, const = dRoadDet[iCondSurface - 1, 0], dRoadDet[iCondSurface - 1, 1]
+    rates = np.where(foo == float(3), moisture_coeff, np.nan)
+    rates = np.where(np.isin(iCondSurface, CONSTANT_SURFACES) | (foo == float(1)), const, rates)
+    return np.where(rates >= 0, rates, np.nan)
+
+
+def closed_form_roughness(roughness, is_reset, reset_roughness, rates, caps):
+    """
+    Roughness for every year given the initial roughness, the years in which a work or repair resets it (to
+    reset_roughness), the constant yearly rates and the caps. The year axis is last.
+    """
+    shape = is_reset.shape
+    years = shape[-1]
+
+    # Every reset (and year 0) starts a new segment of the geometric series
+    starts = is_reset.copy()
+    starts[..., 0] = True
+    segment = np.cumsum(starts, axis=-1) - 1
+    year = np.arange(years)
+    start_year = np.maximum.accumulate(np.where(starts, year, 0), axis=-1)
+    k = year - start_year
+
+    # Initial value and growth factor of each segment: (..., segments), other years are written to a spare slot
+    n_segments = segment.max() + 1 if segment.size else 1
+    slot = np.where(starts, segment, n_segments)
+    initial = np.where(is_reset, reset_roughness, np.asarray(roughness, dtype=np.float64)[..., np.newaxis])
+    first = np.zeros(shape[:-1] + (n_segments + 1,))
+    factor = np.zeros(shape[:-1] + (n_segments + 1,))
+    np.put_along_axis(first, slot, initial, axis=-1)
+    np.put_along_axis(factor, slot, 1 + rates, axis=-1)
+    first, factor = first[..., :-1], factor[..., :-1]
+
+    # V, V(1 + c), V(1 + c)(1 + c), ... for each segment, multiplied in year order
+    series = np.empty(shape[:-1] + (n_segments, years))
+    series[..., 0] = first
+    series[..., 1:] = factor[..., np.newaxis]
+    np.cumprod(series, axis=-1, out=series)
+
+    series = series.reshape(shape[:-1] + (n_segments * years,))
+    dCondIRI = np.take_along_axis(series, segment * years + k, axis=-1)
+    return np.where(k > 0, cap_roughness(dCondIRI, caps), dCondIRI)
@@ -0,0 +1,108 @@
+"""
+Economic internal rate of return (EIRR) for a whole (sections, years) matrix of net benefits at once.
+
+numpy_financial.irr finds every real root of the NPV polynomial (one eigenvalue problem per row) and then picks one:
+the smallest non negative rate if there is one, otherwise the negative rate closest to zero. Here the same root is found
+directly for all rows together. In terms of x = 1 / (1 + r) the rates r >= 0 are the roots of
+sum(v_t * x^t) in (0, 1] and in terms of g = 1 + r the rates -1 <= r < 0 are the roots of sum(v_t * g^(N - t)) in
+[0, 1), so in both cases the wanted root is the first one met going down from 1 towards 0. Each row is scanned on a grid
+for its first sign change, which is then refined with a safeguarded Newton iteration (bisection whenever the Newton step
+leaves the bracket).
+"""
+
+import numpy as np
+
+# Number of grid intervals on [0, 1] which are scanned for the first sign change. Roots closer together than the grid
+# spacing can be missed, as can double roots (which numpy_financial usually reports as complex)
+GRID_SIZE = 512
+MAX_ITERATIONS = 100
+
+
+def polyval(coefficients, x):
+    """
+    Value and derivative of the polynomials with the given (rows, degree + 1) coefficients (highest degree first) at x,
+    which has the same number of rows
+    """
+    value = np.zeros(x.shape)
+    derivative = np.zeros(x.shape)
+    for c in np.moveaxis(coefficients, -1, 0):
+        c = c.reshape(c.shape + (1,) * (x.ndim - 1))
+        derivative = derivative * x + value
+        value = value * x + c
+    return value, derivative
+
+
+def lowest_order_sign(coefficients):
+    """
+    Sign of the polynomials just above 0, i.e. the sign of their lowest order non zero coefficient
+    """
+    nonzero = coefficients != 0
+    last = coefficients.shape[-1] - 1 - np.argmax(nonzero[:, ::-1], axis=-1)
+    return np.sign(coefficients[np.arange(coefficients.shape[0]), last])
+
+
+def first_root_below_one(coefficients):
+    """
+    The largest root in (0, 1] of each polynomial (rows with a non zero coefficient only), NaN if there is none
+    """
+    rows = coefficients.shape[0]
+    grid = np.linspace(1.0, 0.0, GRID_SIZE + 1)
+    signs = np.sign(polyval(coefficients, np.broadcast_to(grid, (rows, GRID_SIZE + 1)))[0])
+    signs[:, -1] = lowest_order_sign(coefficients)
+
+    # First interval [grid[k + 1], grid[k]] whose upper end is a root or whose ends have opposite signs
+    bracketed = (signs[:, :-1] == 0) | (signs[:, :-1] * signs[:, 1:] < 0)
+    found = bracketed.any(axis=-1)
+    k = np.argmax(bracketed, axis=-1)
+    hi, lo = grid[k], grid[k + 1]
+    sign_lo = signs[np.arange(rows), k + 1]
+    converged = ~found | (signs[np.arange(rows), k] == 0)
+
+    x = np.where(converged, hi, 0.5 * (lo + hi))
+    for _ in range(MAX_ITERATIONS):
+        if converged.all():
+            break
+        value, derivative = polyval(coefficients, x)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            newton = x - value / derivative
+        converged |= value == 0
+
+        # Shrink the bracket around the root, then take the Newton step if it stays inside it
+        below = np.sign(value) == sign_lo
+        lo, hi = np.where(below, x, lo), np.where(below, hi, x)
+        step = np.where((newton > lo) & (newton < hi), newton, 0.5 * (lo + hi))
+        converged |= (np.abs(step - x) <= 4 * np.finfo(float).eps * np.abs(x)) | (
+            hi - lo <= 4 * np.finfo(float).eps * hi
+        )
+        x = np.where(converged, x, step)
+
+    return np.where(found, x, np.nan)
+
+
+def irr(values):
+    """
+    Drop in replacement of numpy_financial.irr for (..., years) cash flows, solving all rows together. It returns NaN
+    in the same cases: all cash flows of the same sign or no real rate of return >= -100%.
+    """
+    values = np.asarray(values, dtype=np.float64)
+    flows = values.reshape((-1, values.shape[-1]))
+    result = np.full(flows.shape[0], np.nan)
+
+    solvable = flows.any(axis=-1)
+    flows = flows[solvable]
+
+    # Rates r >= 0, as roots x = 1 / (1 + r) of sum(v_t * x^t)
+    x = first_root_below_one(flows[:, ::-1])
+    with np.errstate(divide="ignore"):
+        rates = 1.0 / x - 1.0
+
+    # Otherwise rates -1 <= r < 0, as roots g = 1 + r of sum(v_t * g^(N - t)), where g = 0 is a root if v_N = 0
+    negative = np.isnan(rates)
+    g = first_root_below_one(flows[negative])
+    g = np.where(np.isnan(g) & (flows[negative, -1] == 0), 0.0, g)
+    rates[negative] = g - 1.0
+
+    result[solvable] = rates
+    if values.ndim == 1:
+        return result[0]
+    return result.reshape(values.shape[:-1])
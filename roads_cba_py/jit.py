@@ -0,0 +1,144 @@
+"""
+Optional numba backend for the batched engine: the year by year pavement recurrence (lanes, width, surface, SNC, age
+and roughness, including the HDM-4 equation) as one compiled loop over (sections, alternatives, years).
+
+numba is not a requirement of the package. Without it AVAILABLE is False and the model uses the numpy path (closed
+form roughness, see deterioration), which remains the reference. Both agree to floating point rounding: the constant
+rate deterioration is multiplied out in the same order, the HDM-4 equation may differ in the last bits of exp and pow.
+"""
+
+import math
+
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+AVAILABLE = numba is not None
+
+# Columns of the work table passed to pavement_recurrence
+WORK_COLUMNS = ("lanes_class", "width", "surface", "thickness", "strength", "snc", "iri")
+LANES, WIDTH, SURFACE, THICKNESS, STRENGTH, SNC, IRI = range(len(WORK_COLUMNS))
+
+
+def next_year_roughness(dRoughness, iAge, iSurface, dSNC, dESA, dRoadDet, moisture_coeff):
+    """
+    One step of calculate_next_year_roughness_vectorized for a single cell
+    """
+    row = dRoadDet[iSurface - 1]
+    foo, const, Kgp, Kgm, a0, a1, a2 = row[0], row[1], row[2], row[3], row[4], row[5], row[6]
+    if iSurface == 1 or iSurface == 4 or iSurface == 5 or iSurface == 6 or iSurface == 7 or foo == 1.0:
+        return dRoughness * (1 + const)
+    if foo == 3.0:
+        return dRoughness * (1 + moisture_coeff)
+    return dRoughness + (
+        Kgp * (a0 * math.exp(Kgm * moisture_coeff * iAge) * math.pow(1 + dSNC * a1, -5.0) * dESA + a2 * iAge)
+        + (Kgm * moisture_coeff * dRoughness)
+    )
+
+
+def pavement_recurrence_loop(
+    lanes,
+    width,
+    surface,
+    snc,
+    roughness,
+    age,
+    moisture_coeff,
+    dESATotal,
+    work_idx,
+    repair_idx,
+    is_work,
+    is_repair,
+    works,
+    dRoadDet,
+):
+    """
+    Lanes, width, surface, SNC and roughness for every (section, alternative, year). The section arguments are
+    (sections,) arrays, dESATotal is (sections, years), work_idx and repair_idx (sections, alternatives) rows of the
+    works table (WORK_COLUMNS) and is_work / is_repair the (sections, alternatives, years) masks of the schedule.
+    """
+    sections, alternatives, years = is_work.shape
+    iCondLanes = np.zeros(is_work.shape, dtype=np.int16)
+    dCondWidth = np.zeros(is_work.shape, dtype=np.float64)
+    iCondSurface = np.zeros(is_work.shape, dtype=np.int16)
+    dCondSNC = np.zeros(is_work.shape, dtype=np.float64)
+    dCondIRI = np.zeros(is_work.shape, dtype=np.float64)
+
+    for s in range(sections):
+        for a in range(alternatives):
+            work, repair = works[work_idx[s, a]], works[repair_idx[s, a]]
+            iYearLanes, dYearWidth, iYearSurface = lanes[s], width[s], surface[s]
+            dYearSNC, dYearRoughness, iYearAge = snc[s], roughness[s], age[s]
+
+            for y in range(years):
+                if is_work[s, a, y]:
+                    if work[LANES] > 0:
+                        iYearLanes, dYearWidth, iYearSurface = int(work[LANES]), work[WIDTH], int(work[SURFACE])
+                    if work[THICKNESS] > 0:
+                        dYearSNC = dYearSNC + work[THICKNESS] * work[STRENGTH] * 0.0393701
+                    if work[SNC] > 0:
+                        dYearSNC = work[SNC]
+                if is_repair[s, a, y]:
+                    if repair[LANES] > 0:
+                        iYearLanes, dYearWidth, iYearSurface = int(repair[LANES]), repair[WIDTH], int(repair[SURFACE])
+                    if repair[SNC] > 0:
+                        dYearSNC = repair[SNC]
+
+                if y > 0:
+                    dYearRoughness = next_year_roughness(
+                        dYearRoughness, iYearAge, iYearSurface, dYearSNC, dESATotal[s, y], dRoadDet, moisture_coeff[s]
+                    )
+                    cap = 25.0 if iYearSurface == 4 or iYearSurface == 5 else 16.0
+                    if not dYearRoughness < cap:
+                        dYearRoughness = cap
+
+                iYearAge = iYearAge + 1
+                if is_work[s, a, y]:
+                    dYearRoughness, iYearAge = work[IRI], 1
+                if is_repair[s, a, y]:
+                    dYearRoughness, iYearAge = repair[IRI], 1
+
+                iCondLanes[s, a, y] = iYearLanes
+                dCondWidth[s, a, y] = dYearWidth
+                iCondSurface[s, a, y] = iYearSurface
+                dCondSNC[s, a, y] = dYearSNC
+                dCondIRI[s, a, y] = dYearRoughness
+
+    return iCondLanes, dCondWidth, iCondSurface, dCondSNC, dCondIRI
+
+
+if AVAILABLE:
+    next_year_roughness = numba.njit(cache=True)(next_year_roughness)
+    pavement_recurrence_loop = numba.njit(cache=True)(pavement_recurrence_loop)
+
+
+def work_table(works):
+    """
+    The WORK_COLUMNS of the work catalogue as a (works, columns) float array
+    """
+    return np.column_stack([np.asarray(works[c], dtype=np.float64) for c in WORK_COLUMNS])
+
+
+def pavement_recurrence(inputs, moisture_coeff, dESATotal, work_idx, repair_idx, is_work, is_repair, works, dRoadDet):
+    """
+    pavement_recurrence_loop over the section arrays of the batched engine
+    """
+    return pavement_recurrence_loop(
+        inputs["lanes"].astype(np.int64),
+        inputs["width"].astype(np.float64),
+        inputs["surface_type"].astype(np.int64),
+        inputs["structural_no"].astype(np.float64),
+        inputs["roughness"].astype(np.float64),
+        inputs["pavement_age"].astype(np.int64),
+        np.asarray(moisture_coeff, dtype=np.float64),
+        np.ascontiguousarray(dESATotal, dtype=np.float64),
+        np.asarray(work_idx, dtype=np.int64),
+        np.asarray(repair_idx, dtype=np.int64),
+        np.ascontiguousarray(is_work),
+        np.ascontiguousarray(is_repair),
+        work_table(works),
+        np.ascontiguousarray(dRoadDet, dtype=np.float64),
+    )
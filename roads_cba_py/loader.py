@@ -0,0 +1,95 @@
+"""
+Bulk loading of section JSON files (as in tests/example_data) with a thread pool, straight into a SectionBatch, and of
+the .output.json golden results next to them.
+
+orjson is used to parse the files when it is installed, it is not a requirement of the package. It rejects the NaN
+that json writes for a missing EIRR, those files are parsed with json.
+"""
+
+import glob
+import json
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor
+
+from roads_cba_py.cba_result import CbaResultBatch
+from roads_cba_py.section_batch import SectionBatch
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+SECTION_FILE = re.compile(r"section_(.*)\.json$")
+OUTPUT_SUFFIX = ".output.json"
+
+
+def loads(data: bytes):
+    if orjson is not None:
+        try:
+            return orjson.loads(data)
+        except ValueError:
+            pass
+    return json.loads(data)
+
+
+def read_json(filename):
+    with open(filename, "rb") as f:
+        return loads(f.read())
+
+
+def section_files(path):
+    """
+    The section input files of a directory or glob, sorted and without the .output.json results
+    """
+    pattern = os.path.join(path, "section_*.json") if os.path.isdir(path) else path
+    return sorted(f for f in glob.glob(pattern) if not f.endswith(OUTPUT_SUFFIX))
+
+
+def identifier(filename):
+    """
+    The section identifier in a section_<identifier>.json or section_<identifier>.output.json file name
+    """
+    match = SECTION_FILE.search(os.path.basename(filename).replace(OUTPUT_SUFFIX, ".json"))
+    if match is None:
+        raise ValueError(f"Not a section file name: {filename}")
+    return match[1]
+
+
+def output_file(filename):
+    return filename[: -len(".json")] + OUTPUT_SUFFIX
+
+
+def read_files(files, max_workers=None):
+    """
+    The parsed JSON of files, in order, read on a thread pool
+    """
+    files = list(files)
+    if len(files) <= 1:
+        return [read_json(f) for f in files]
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return list(executor.map(read_json, files))
+
+
+def load_sections(path, max_workers=None) -> SectionBatch:
+    """
+    The sections of the section_*.json files of a directory or glob, in file name order
+    """
+    return SectionBatch.from_records(read_files(section_files(path), max_workers))
+
+
+def load_examples(path, max_workers=None):
+    """
+    The sections of a directory or glob that have a golden .output.json, and those results as a CbaResultBatch in the
+    same order. Each result is matched to its section by the identifier of the file names.
+    """
+    files = [f for f in section_files(path) if os.path.exists(output_file(f))]
+    if not files:
+        raise ValueError(f"No section files with results in {path}")
+    records = read_files(files + [output_file(f) for f in files], max_workers)
+    sections, outputs = records[: len(files)], records[len(files) :]
+    for f, section, output in zip(files, sections, outputs):
+        if not identifier(f) == section.get("orma_way_id") == output.get("orma_way_id"):
+            raise ValueError(f"{f} is not section {section.get('orma_way_id')} of {output_file(f)}")
+
+    return SectionBatch.from_records(sections), CbaResultBatch.from_rows(outputs)
@@ -0,0 +1,92 @@
+import numpy as np
+import pandas as pd
+
+from roads_cba_py.validation import parse_sections
+
+# The ORMA column of each Section field and how Section.from_row coerces it: as is, with maybe_int, with maybe_float
+# or, for the width, with maybe_float after reading "6+" as 6
+ORMA_COLUMNS = {
+    "orma_way_id": ("way_id_district", None),
+    "road_number": ("road number", None),
+    "road_name": ("name", None),
+    "road_start": ("road start location", None),
+    "road_end": ("road end location", None),
+    "province": ("province", None),
+    "district": ("district", None),
+    "commune": ("section_commune_gso", None),
+    "management": ("management", "int"),
+    "length": ("length", None),
+    "lanes": ("section_lanes", "int"),
+    "width": ("width", "width"),
+    "road_class": ("link_class", None),
+    "terrain": ("section_terrain", None),
+    "temperature": ("section_temperature", None),
+    "moisture": ("section_moisture", None),
+    "surface_type": ("section_surface", None),
+    "condition_class": ("condition", None),
+    "roughness": ("iri", "float"),
+    "traffic_level": ("section_traffic", None),
+    "traffic_growth": ("section_traffic_growth", None),
+    "pavement_age": ("section_pavement_age", "int"),
+    "aadt_motorcyle": ("section_motorcycle", "int"),
+    "aadt_carsmall": ("section_small_car", "int"),
+    "aadt_carmedium": ("section_medium_car", "int"),
+    "aadt_delivery": ("section_delivery_vehicle", "int"),
+    "aadt_4wheel": ("section_four_wheel", "int"),
+    "aadt_smalltruck": ("section_light_truck", "int"),
+    "aadt_mediumtruck": ("section_medium_truck", "int"),
+    "aadt_largetruck": ("section_heavy_truck", "int"),
+    "aadt_articulatedtruck": ("section_articulated_truck", "int"),
+    "aadt_smallbus": ("section_small_bus", "int"),
+    "aadt_mediumbus": ("section_medium_bus", "int"),
+    "aadt_largebus": ("section_large_bus", "int"),
+    "aadt_total": ("aadt", "int"),
+}
+
+
+def maybe_number(values, integer):
+    """
+    Section.maybe_int (integer) or Section.maybe_float for a whole column: missing and false values (None, NaN, ""
+    and 0) are 0, numbers and numeric strings are converted (truncated to int for maybe_int). Values that aren't
+    numbers are kept as they are, for parse_sections to report them.
+    """
+    values = np.asarray(values)
+    if values.dtype.kind in "biuf":
+        values = np.where(np.isnan(values), 0.0, values.astype(np.float64))
+        return np.trunc(values) if integer else values
+
+    values = values.astype(object)
+    coerced = np.zeros(len(values), dtype=object)
+    present = ~pd.isna(values) & ~pd.Series(values).isin(["", 0]).to_numpy()
+    codes, uniques = pd.factorize(values[present])
+    coerced[present] = np.array([maybe_number_value(v, integer) for v in uniques], dtype=object)[codes]
+    return coerced
+
+
+def maybe_number_value(value, integer):
+    try:
+        return int(value) if integer else float(value)
+    except (TypeError, ValueError, OverflowError):
+        return value
+
+
+def orma_columns(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    An ORMA extract mapped column by column to the Section fields, coerced as Section.from_row coerces a row
+    """
+    columns = {}
+    for name, (column, coercion) in ORMA_COLUMNS.items():
+        values = df[column].to_numpy()
+        if coercion == "width":
+            values = np.where(values.astype(object) == "6+", 6.0, values.astype(object))
+        columns[name] = values if coercion is None else maybe_number(values, coercion == "int")
+    return pd.DataFrame(columns, index=df.index)
+
+
+def parse_orma(df: pd.DataFrame):
+    """
+    The sections of an ORMA extract as a SectionBatch ready for CostBenefitAnalysisModel.compute_cba_for_batch, with
+    the validate_sections table of their errors. As for Section.from_row, only the rows that can't be converted are
+    left out of the batch.
+    """
+    return parse_sections(orma_columns(df).reset_index(drop=True), strict=False)
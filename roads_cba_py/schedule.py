@@ -0,0 +1,133 @@
+import numpy as np
+
+# dWorkEvaluated has one row per (road class, condition class) for each surface type in turn, see
+# CostBenefitAnalysisModel.get_work_evalauted_index
+ROWS_PER_SURFACE = 50
+
+
+def applicable_works(dWorkEvaluated, works, upgrades=True):
+    """
+    For each surface type (index surface type - 1) the work numbers that can be done on it: every work of the
+    catalogue maintained by the same repair works as those dWorkEvaluated plans for the surface and, with upgrades,
+    every upgrade to another surface that leaves the road smoother than any of those works does
+    """
+    planned = np.asarray(dWorkEvaluated, dtype=np.int64)[:, 1:4]
+    surfaces = len(planned) // ROWS_PER_SURFACE
+    work_no = np.arange(1, len(works) + 1)
+    is_upgrade = works["lanes_class"] > 0
+
+    applicable = []
+    for surface in range(1, surfaces + 1):
+        rows = planned[(surface - 1) * ROWS_PER_SURFACE : surface * ROWS_PER_SURFACE]
+        family = np.unique(works["repair"][rows[rows > 0] - 1])
+        same_surface = ~is_upgrade & np.isin(works["repair"], family)
+        smoothest = works["iri"][same_surface].min()
+        upgrade = is_upgrade & (works["surface"] != surface) & (works["iri"] < smoothest)
+        applicable.append(work_no[same_surface | (upgrade & upgrades)])
+    return applicable
+
+
+class AlternativeSchedules(object):
+    """
+    The alternatives evaluated for each of the 350 (surface type, road class, condition class) rows of dWorkEvaluated,
+    compiled once so that planning a section is a lookup. For every row it holds the number of alternatives, the cost
+    factor and for each alternative its work number and year, the number of its repair work and (alternatives, years)
+    masks of the years of the analysis horizon with the work and with its repairs, one every repair period of the work
+    up to the end of the horizon. Alternatives beyond the number evaluated repeat the base alternative. It also records
+    which years and alternatives are plain copies of others (see shared_prefix and shift_source), which the loop engine
+    doesn't recompute.
+
+    By default these are the 13 alternatives of dWorkEvaluated, extended() searches the whole catalogue instead.
+    """
+
+    def __init__(self, dWorkEvaluated, works, years=20):
+        work_year, road_work_number, alt_1, alt_2, unit_cost_mult = np.asarray(dWorkEvaluated, dtype=np.float64).T
+        rows = len(work_year)
+
+        alternatives = np.zeros((rows, 13, 2), dtype=np.float64)
+        alternatives[:, :, 0] = road_work_number[:, np.newaxis]
+        alternatives[:, :, 1] = work_year[:, np.newaxis]
+
+        has_first, has_second = alt_1 > 0, alt_2 > 0
+        alternatives[has_first, 1:7, 0] = alt_1[has_first, np.newaxis]
+        alternatives[has_first, 1:7, 1] = [1, 2, 3, 4, 5, 6]
+        alternatives[has_second, 7:13, 0] = alt_2[has_second, np.newaxis]
+        alternatives[has_second, 7:13, 1] = [1, 2, 3, 4, 5, 6]
+
+        count = np.where(has_second, 13, np.where(has_first, 7, 2))
+        self.compile(alternatives, count, unit_cost_mult, works, years)
+
+    @classmethod
+    def extended(cls, dWorkEvaluated, works, years=20, work_years=range(1, 7), upgrades=True):
+        """
+        The base alternative of dWorkEvaluated followed by every applicable work (see applicable_works) in each of
+        work_years, for every row. Work years must be within the horizon, a work after it would leave the section
+        untouched unlike the base alternative.
+        """
+        work_year, road_work_number, _, _, unit_cost_mult = np.asarray(dWorkEvaluated, dtype=np.float64).T
+        work_years = sorted(set(int(y) for y in work_years))
+        if not work_years or work_years[0] < 1 or work_years[-1] > years:
+            raise ValueError(f"Work years must be from 1 to the {years} years of the horizon, got {work_years}")
+
+        applicable = applicable_works(dWorkEvaluated, works, upgrades)
+        surface = np.arange(len(work_year)) // ROWS_PER_SURFACE
+        count = 1 + np.array([len(applicable[s]) for s in surface]) * len(work_years)
+
+        alternatives = np.zeros((len(work_year), count.max(), 2), dtype=np.float64)
+        alternatives[:, :, 0] = road_work_number[:, np.newaxis]
+        alternatives[:, :, 1] = work_year[:, np.newaxis]
+        for row, s in enumerate(surface):
+            candidates = np.array([(w, y) for w in applicable[s] for y in work_years], dtype=np.float64)
+            alternatives[row, 1 : count[row]] = candidates.reshape(-1, 2)
+
+        schedules = cls.__new__(cls)
+        schedules.compile(alternatives, count, unit_cost_mult, works, years)
+        return schedules
+
+    def compile(self, alternatives, count, cost_factor, works, years):
+        rows, size = alternatives.shape[0:2]
+        self.alternatives = alternatives
+        self.count = count
+        self.cost_factor = cost_factor
+        self.work = alternatives[:, :, 0].astype(np.int64)
+        self.work_year = alternatives[:, :, 1].astype(np.int64)
+        self.repair = works["repair"][self.work - 1].astype(np.int64)
+
+        self.years = years
+        horizon = np.arange(1, years + 1)
+        self.is_work = horizon == self.work_year[:, :, np.newaxis]
+        repair_period = works["repair_period"][self.work - 1].astype(np.int64)
+        self.is_repair = np.zeros((rows, size, years), dtype=bool)
+        # Every repair that falls within the horizon, however long it is
+        shortest = repair_period[repair_period > 0].min(initial=years)
+        for i in range(1, years // shortest + 1):
+            self.is_repair |= horizon == (self.work_year + i * repair_period)[:, :, np.newaxis]
+
+        # Index of the first year with a work or a repair, years if there is none. Up to it an alternative is identical
+        # to the base alternative as long as the base has had no work either.
+        has_event = self.is_work | self.is_repair
+        self.first_event = np.where(has_event.any(axis=-1), has_event.argmax(axis=-1), years)
+        self.shared_prefix = np.minimum(self.first_event, self.first_event[:, :1])
+        self.shared_prefix[:, 0] = 0
+
+        # An earlier alternative with the same work, done in the same year or earlier, whose trajectory from its work
+        # onwards is the same shifted by shift years (as long as deterioration doesn't depend on the year), -1 if none
+        self.shift_source = np.full((rows, size), -1, dtype=np.int64)
+        self.shift = np.zeros((rows, size), dtype=np.int64)
+        for ia in range(1, size):
+            for ib in range(ia):
+                source = (
+                    (self.shift_source[:, ia] < 0)
+                    & (self.work[:, ib] == self.work[:, ia])
+                    & (self.work_year[:, ib] >= 1)
+                    & (self.work_year[:, ib] <= self.work_year[:, ia])
+                    & (self.work_year[:, ia] <= years)
+                    & (self.first_event[:, ib] == self.work_year[:, ib] - 1)
+                    & (self.first_event[:, ia] == self.work_year[:, ia] - 1)
+                    & (self.shared_prefix[:, ia] == self.first_event[:, ia])
+                )
+                self.shift_source[source, ia] = ib
+                self.shift[source, ia] = self.work_year[source, ia] - self.work_year[source, ib]
+
+    def __len__(self):
+        return len(self.count)
@@ -5,6 +5,7 @@ from schematics.exceptions import ConversionError
 
 from schematics.models import Model
 from schematics.types import IntType, StringType, FloatType
+from schematics.undefined import Undefined
 
 
 class InvalidSection(object):
@@ -112,7 +113,6 @@ class Section(Model):
     def from_row(cls, row):
         in_data = {
             "orma_way_id": row["way_id_district"],
-            "section_id": row["way_id_district"],
             "road_number": row["road number"],
             "road_name": row["name"],
             "road_start": row["road start location"],
@@ -153,7 +153,7 @@ class Section(Model):
         try:
             return Section(in_data)
         except Exception as err:
-            return InvalidSection(err, in_data)
+            return InvalidSection(err.errors, in_data)
 
     def to_dict(self):
         return {
@@ -216,19 +216,55 @@ class Section(Model):
     REQUIRED_FIELDS = ["lanes", "width"]
 
     def invalid_reason(self):
-        errors = []
-        if is_missing(self.road_type) and is_missing(self.surface_type):
-            errors.append("Must define either road type or road surface type")
-        if is_missing(self.width) and is_missing(self.lanes):
-            errors.append("Must define either road width or number of lanes")
-        if is_missing(self.roughness) and is_missing(self.condition_class):
-            errors.append("Must define either roughness or road condition")
-        if is_missing(self.traffic_level) and is_missing(self.aadt_total):
-            errors.append("Must define either aadt_total or traffic_level")
-        if is_missing(self.terrain):
-            errors.append("No terrain data")
+        errors = [message for fields, message in SECTION_RULES if all(is_missing(getattr(self, f)) for f in fields)]
         return errors if errors else None
 
 
+# The rules of Section.invalid_reason: a section breaks a rule when all of its fields are missing
+SECTION_RULES = [
+    (("road_type", "surface_type"), "Must define either road type or road surface type"),
+    (("width", "lanes"), "Must define either road width or number of lanes"),
+    (("roughness", "condition_class"), "Must define either roughness or road condition"),
+    (("traffic_level", "aadt_total"), "Must define either aadt_total or traffic_level"),
+    (("terrain",), "No terrain data"),
+]
+
+
 def is_missing(val):
     return val is None or val == 0
+
+
+class TrustedSection(object):
+    """
+    A Section built without schematics conversion or validation, for data which has been validated already (e.g.
+    sections we wrote to Parquet ourselves): the values are taken as they are, absent fields take the Section
+    defaults. It has the attributes and methods of Section the model uses, so compute_cba_for_section accepts it.
+    Untrusted input should go through Section (or parse_section).
+    """
+
+    __slots__ = tuple(Section.fields)
+
+    DEFAULTS = {name: None if field.default is Undefined else field.default for name, field in Section.fields.items()}
+
+    def __init__(self, data):
+        for name, default in TrustedSection.DEFAULTS.items():
+            setattr(self, name, data.get(name, default))
+
+    def __str__(self):
+        return str(self.to_primitive())
+
+    def __repr__(self):
+        return f"TrustedSection({self.to_primitive()})"
+
+    get_aadts = Section.get_aadts
+    set_aadts = Section.set_aadts
+    invalid_reason = Section.invalid_reason
+
+    def to_primitive(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+    def to_section(self) -> Section:
+        """
+        The Section of the same data, converted and checked as untrusted input
+        """
+        return Section(self.to_primitive())
@@ -0,0 +1,134 @@
+from typing import List
+
+import numpy as np
+import pandas as pd
+from schematics.types import IntType, FloatType
+from schematics.undefined import Undefined
+
+from roads_cba_py.section import Section, TrustedSection
+
+# The traffic of the 12 vehicle classes, in the order of Section.get_aadts
+AADT_FIELDS = (
+    "aadt_motorcyle",
+    "aadt_carsmall",
+    "aadt_carmedium",
+    "aadt_delivery",
+    "aadt_4wheel",
+    "aadt_smalltruck",
+    "aadt_mediumtruck",
+    "aadt_largetruck",
+    "aadt_articulatedtruck",
+    "aadt_smallbus",
+    "aadt_mediumbus",
+    "aadt_largebus",
+)
+
+
+def column_spec(field):
+    """
+    dtype and default of the SectionBatch column for a Section field. Numeric fields are float columns with NaN where
+    the value is None, all others object columns. Like Section, absent values take the default of the field while
+    explicit None stays None (e.g. fill_defaults treats a traffic level of None and of 0 differently).
+    """
+    default = None if field.default is Undefined else field.default
+    if isinstance(field, (IntType, FloatType)):
+        return np.dtype(np.float64), default
+    return np.dtype(object), default
+
+
+COLUMNS = {name: column_spec(field) for name, field in Section.fields.items()}
+
+
+class SectionBatch(object):
+    """
+    Columnar sections: one numpy array per Section field, all of the same length. Indexing by field name gives the
+    column, by position a Section and by slice or index array a smaller SectionBatch.
+    """
+
+    def __init__(self, columns, size=None):
+        if size is None:
+            size = len(next(iter(columns.values()))) if columns else 0
+        self.columns = {name: self.to_column(columns.get(name), size, name) for name in COLUMNS}
+
+    @staticmethod
+    def to_column(values, size, name):
+        dtype, default = COLUMNS[name]
+        if isinstance(values, np.ndarray) and values.dtype == dtype and len(values) == size:
+            return values
+        if values is None:
+            values = [default] * size
+        if len(values) != size:
+            raise ValueError(f"Column '{name}' has {len(values)} values, expected {size}")
+
+        values = pd.Series(values, dtype=object)
+        if dtype == object:
+            return values.where(values.notna(), None).to_numpy(dtype=object)
+        return pd.to_numeric(values).to_numpy(dtype=np.float64)
+
+    @staticmethod
+    def to_python(values, name):
+        """
+        Column values as Section holds them, None where missing
+        """
+        if COLUMNS[name][0] == object:
+            return values.tolist()
+        if isinstance(Section.fields[name], IntType):
+            return [None if v != v else int(v) for v in values.tolist()]
+        return [None if v != v else v for v in values.tolist()]
+
+    def __len__(self):
+        return len(self.columns["orma_way_id"])
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            return self.columns[key]
+        if isinstance(key, (int, np.integer)):
+            return self.section(int(key))
+        return SectionBatch({name: column[key] for name, column in self.columns.items()})
+
+    def __iter__(self):
+        return iter(self.to_sections())
+
+    def section(self, i) -> Section:
+        return Section({name: self.to_python(column[i : i + 1], name)[0] for name, column in self.columns.items()})
+
+    def get_aadts(self):
+        """
+        The traffic of the 12 vehicle classes as a (sections, 12) array
+        """
+        return np.column_stack([self.columns[name] for name in AADT_FIELDS]).reshape(len(self), 12)
+
+    @classmethod
+    def from_sections(cls, sections: List[Section]):
+        return SectionBatch({name: [getattr(s, name) for s in sections] for name in COLUMNS}, len(sections))
+
+    def to_sections(self, trusted=False) -> List[Section]:
+        """
+        The sections as Section, or as TrustedSection (without conversion and validation) for trusted batches, such as
+        those read back from files we wrote
+        """
+        cls = TrustedSection if trusted else Section
+        values = {name: self.to_python(column, name) for name, column in self.columns.items()}
+        return [cls({name: values[name][i] for name in COLUMNS}) for i in range(len(self))]
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        From dicts keyed by Section field, such as Section.to_primitive() or the example data files
+        """
+        return SectionBatch({name: [r.get(name, COLUMNS[name][1]) for r in records] for name in COLUMNS}, len(records))
+
+    @classmethod
+    def from_dataframe(cls, df: pd.DataFrame):
+        """
+        From a DataFrame with a column per Section field, other columns are ignored and absent ones take the defaults.
+        Missing values (NaN or None) are None.
+        """
+        return SectionBatch({name: df[name].to_numpy() for name in COLUMNS if name in df.columns}, len(df))
+
+    def to_dataframe(self) -> pd.DataFrame:
+        return pd.DataFrame(self.columns)
+
+    @classmethod
+    def concatenate(cls, batches):
+        return SectionBatch({name: np.concatenate([b.columns[name] for b in batches]) for name in COLUMNS})
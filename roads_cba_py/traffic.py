@@ -0,0 +1,49 @@
+import numpy as np
+
+
+class TrafficTables(object):
+    """
+    The traffic projections and axle loadings of the model, compiled once so that projecting the traffic of any number
+    of sections is a broadcast copy and a cumulative product. growth holds the growth factor of each of the 12 vehicle
+    classes in every year of the horizon for every growth scenario (scenario, vehicle, year), 1 in the base year,
+    esa_weights the equivalent standard axles of every vehicle class (vehicle, 1) and annualisation the factor to yearly
+    million ESA per lane of each lanes class.
+
+    The tables hold the factors rather than the cumulative growth and the ESA per lanes class already annualised: the
+    original model grows the traffic one year after the other from the base year and annualises the ESA after summing
+    it, and multiplying by precomputed products rounds differently. Kept in that order, the projections are the same
+    as the original model's to the last bit.
+    """
+
+    def __init__(self, dGrowth, dVehicleFleet, dWidthDefaults, years=20):
+        self.years = years
+        self.growth = np.repeat(1.0 + np.asarray(dGrowth, dtype=np.float64)[:, :, np.newaxis], years, axis=-1)
+        self.growth[:, :, 0] = 1.0
+        self.esa_weights = np.asarray(dVehicleFleet, dtype=np.float64)[0:12, 0:1]
+        self.annualisation = 365 / 1000000 / np.asarray(dWidthDefaults, dtype=np.float64)[:, 1]
+
+    def project(self, dBaseAADT, iGrowthScenario):
+        """
+        Annual traffic (..., 13, years) of the 12 vehicle classes and their total from the base year traffic (..., 12)
+        """
+        dBaseAADT = np.asarray(dBaseAADT, dtype=np.float64)
+        dAADT = np.empty(dBaseAADT.shape[:-1] + (13, self.years), dtype=np.float64)
+        self.project_into(dAADT, dBaseAADT, iGrowthScenario)
+        return dAADT
+
+    def project_into(self, dAADT, dBaseAADT, iGrowthScenario):
+        """
+        project writing into an existing (..., 13, years) array
+        """
+        dAADT[..., 0:12, 0] = dBaseAADT
+        dAADT[..., 0:12, 1:] = self.growth[np.asarray(iGrowthScenario) - 1, :, 1:]
+        np.cumprod(dAADT[..., 0:12, :], axis=-1, out=dAADT[..., 0:12, :])
+        np.sum(dAADT[..., 0:12, :], axis=-2, out=dAADT[..., 12, :])
+        return dAADT
+
+    def esa_loading(self, dAADT, iLanes):
+        """
+        Equivalent standard axle loading (..., years) of the annual traffic (..., 13, years) for the given lanes classes
+        """
+        annualisation = self.annualisation[np.asarray(iLanes) - 1][..., np.newaxis]
+        return np.sum(dAADT[..., 0:12, :] * self.esa_weights, axis=-2) * annualisation
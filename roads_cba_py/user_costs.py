@@ -0,0 +1,46 @@
+"""
+Road user costs, i.e. vehicle operating costs (VOC) and travel time, for whole grids of roughness at once: the
+(alternatives, years) grid of a section in the loop engine and the (sections, alternatives, years) grid of the batched
+engine.
+
+VOC and speed of each of the 12 vehicle classes are cubic polynomials in the roughness, with coefficients (dVOC and
+dSPEED) depending on the lanes class and the terrain. Each cell is computed with the operations of the original year by
+year loop in the same order, so the results are the same to the last bit.
+"""
+
+import numpy as np
+
+
+def polynomial(coefficients, iri, iri2, iri3):
+    """
+    The cubic polynomial of coefficients (..., powers, vehicles) for every vehicle class, summed up from the constant
+    """
+    return (
+        coefficients[..., 0, :]
+        + (coefficients[..., 1, :] * iri)
+        + (coefficients[..., 2, :] * iri2)
+        + (coefficients[..., 3, :] * iri3)
+    )
+
+
+def user_costs(dCondIRI, iCondLanes, iTerrain, dAADT, dLength, dVOC, dSPEED, dVehicleFleet):
+    """
+    VOC cost, speed per vehicle class, average speed and travel time cost for every cell of a (..., years) grid given
+    its roughness and lanes class. iTerrain and dLength broadcast to the grid, dAADT is the traffic of the 12 vehicle
+    classes as (..., years, 12) and also broadcasts to it. dCondIRI sets the precision (float64 unless it is float32).
+    """
+    lanes, terrain = np.broadcast_arrays(np.asarray(iCondLanes) - 1, np.asarray(iTerrain) - 1)
+    iri = np.asarray(dCondIRI, dtype=np.result_type(dCondIRI, np.float32))[..., np.newaxis]
+    iri2, iri3 = np.power(iri, 2), np.power(iri, 3)
+    length = np.asarray(dLength)[..., np.newaxis]
+
+    voc = polynomial(dVOC[lanes, terrain], iri, iri2, iri3) * dAADT
+    dCostVOC = voc.sum(axis=-1) * dLength * 365 / 1000000
+
+    dCondSpeed = polynomial(dSPEED[lanes, terrain], iri, iri2, iri3)
+    dCondSpeedAve = dCondSpeed.sum(axis=-1) / 12
+
+    hours = 1 / dCondSpeed * length * dVehicleFleet[:, 1] * dVehicleFleet[:, 2] * dAADT * 365 / 1000000
+    dCostTime = hours.sum(axis=-1)
+
+    return dCostVOC, dCondSpeed, dCondSpeedAve, dCostTime
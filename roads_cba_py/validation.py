@@ -0,0 +1,163 @@
+import numpy as np
+import pandas as pd
+from schematics.exceptions import ConversionError, ValidationError
+from schematics.types import IntType, FloatType, StringType
+
+from roads_cba_py.section import Section, InvalidSection, SECTION_RULES
+from roads_cba_py.section_batch import SectionBatch, COLUMNS
+
+# The error table of validate_sections, one row per error of a section
+ERROR_COLUMNS = ["row", "orma_way_id", "field", "error"]
+
+NUMBER_TYPES = (int, float, bool, np.int64, np.float64, np.bool_)
+
+
+def convert(values, field):
+    """
+    A column converted as the Section field converts its value: a float array with NaN where missing for numeric
+    fields, an object array with None where missing for the others. Also returns a mask of the values the field can't
+    convert. Missing values (None or NaN) are None, as for SectionBatch.from_dataframe.
+    """
+    values = np.asarray(values)
+    numeric = isinstance(field, (IntType, FloatType))
+    if numeric and values.dtype.kind in "biuf":
+        converted = values.astype(np.float64)
+        invalid = np.zeros(len(values), dtype=bool)
+    else:
+        values = values.astype(object)
+        converted = np.full(len(values), np.nan if numeric else None, dtype=np.float64 if numeric else object)
+        invalid = np.zeros(len(values), dtype=bool)
+        missing = pd.isna(values)
+        types = pd.Series(values).map(type)
+
+        # Plain numbers in one go, strings once per distinct string (extracts repeat a few of them a lot), anything
+        # else value by value
+        is_number = ~missing & types.isin(NUMBER_TYPES).to_numpy() if numeric else None
+        if numeric:
+            converted[is_number] = values[is_number].astype(np.float64)
+        is_string = ~missing & (types == str).to_numpy()
+        if is_string.any():
+            codes, uniques = pd.factorize(values[is_string])
+            natives = [native(field, v) for v in uniques]
+            converted[is_string] = np.array([v for v, _ in natives], dtype=converted.dtype)[codes]
+            invalid[is_string] = np.array([failed for _, failed in natives])[codes]
+        other = ~missing & ~is_string if is_number is None else ~missing & ~is_string & ~is_number
+        for i in np.nonzero(other)[0]:
+            converted[i], invalid[i] = native(field, values[i])
+
+    if isinstance(field, IntType):
+        number = ~np.isnan(converted)
+        invalid[number] |= ~np.isfinite(converted[number]) | (converted[number] != np.trunc(converted[number]))
+        converted[invalid] = np.nan
+    return converted, invalid
+
+
+def native(field, value):
+    try:
+        value = field.to_native(value)
+    except ConversionError:
+        return (np.nan if isinstance(field, (IntType, FloatType)) else None), True
+    return value, False
+
+
+def invalid_values(converted, field):
+    """
+    Mask of the converted values Section.validate rejects for their length or range
+    """
+    present = pd.notna(converted)
+    invalid = np.zeros(len(converted), dtype=bool)
+    if isinstance(field, StringType):
+        lengths = pd.Series(converted[present], dtype=object).str.len().to_numpy()
+        if field.min_length is not None:
+            invalid[present] |= lengths < field.min_length
+        if field.max_length is not None:
+            invalid[present] |= lengths > field.max_length
+    elif isinstance(field, (IntType, FloatType)):
+        if field.min_value is not None:
+            invalid[present] |= converted[present] < field.min_value
+        if field.max_value is not None:
+            invalid[present] |= converted[present] > field.max_value
+    return invalid
+
+
+def parse_columns(data):
+    """
+    The columns of a DataFrame or SectionBatch converted as Section converts them (absent ones take the defaults),
+    with a mask of the values that can't be converted for each field
+    """
+    if isinstance(data, SectionBatch):
+        return dict(data.columns), {name: np.zeros(len(data), dtype=bool) for name in COLUMNS}
+
+    columns, invalid = {}, {}
+    for name, field in Section.fields.items():
+        if name in data.columns:
+            columns[name], invalid[name] = convert(data[name].to_numpy(), field)
+        else:
+            columns[name] = SectionBatch.to_column(None, len(data), name)
+            invalid[name] = np.zeros(len(data), dtype=bool)
+    return columns, invalid
+
+
+def validate_columns(columns, invalid):
+    """
+    The (row, field, error) of every error in converted columns, ordered by row as InvalidSection reports them:
+    sections that can't be converted only get their conversion errors, the others those of Section.validate and of
+    the rules of Section.invalid_reason
+    """
+    size = len(columns["orma_way_id"])
+    unconverted = np.any([invalid[name] for name in COLUMNS], axis=0) if size else np.zeros(0, dtype=bool)
+
+    conversion = InvalidSection.clean_error("{}", ConversionError(""))
+    validation = InvalidSection.clean_error("{}", ValidationError(""))
+    errors = []
+    for name, field in Section.fields.items():
+        errors.append((invalid[name], name, conversion.format(name)))
+        if field.required:
+            errors.append((~unconverted & pd.isna(columns[name]), name, conversion.format(name)))
+        errors.append((~unconverted & invalid_values(columns[name], field), name, validation.format(name)))
+    for fields, message in SECTION_RULES:
+        missing = np.all([pd.isna(columns[f]) | (columns[f] == 0) for f in fields], axis=0)
+        errors.append((~unconverted & missing, " or ".join(fields), message))
+
+    rows = [np.nonzero(mask)[0] for mask, _, _ in errors]
+    order = np.concatenate([np.full(len(r), i) for i, r in enumerate(rows)] + [np.zeros(0, dtype=np.int64)])
+    rows = np.concatenate(rows + [np.zeros(0, dtype=np.int64)])
+    fields = np.array([field for _, field, _ in errors], dtype=object)
+    messages = np.array([message for _, _, message in errors], dtype=object)
+
+    sort = np.lexsort((order, rows))
+    order = order[sort].astype(np.int64)
+    return rows[sort], fields[order], messages[order]
+
+
+def validate_sections(data) -> pd.DataFrame:
+    """
+    Validate a DataFrame with a column per Section field (or a SectionBatch) in bulk: a table with the row, the
+    orma_way_id, the field and the error of every error of every section. The errors are the ones InvalidSection
+    gives for a parse_section of the row, followed by those of Section.validate and Section.invalid_reason.
+    """
+    columns, invalid = parse_columns(data)
+    return error_table(columns, *validate_columns(columns, invalid))
+
+
+def parse_sections(data, strict=True):
+    """
+    The sections of a DataFrame (or SectionBatch) without any error as a SectionBatch, with the validate_sections
+    table of all errors. Unless strict, only the sections that can't be converted are left out, as parse_section only
+    rejects those.
+    """
+    columns, invalid = parse_columns(data)
+    rows, fields, messages = validate_columns(columns, invalid)
+    if strict:
+        valid = np.ones(len(columns["orma_way_id"]), dtype=bool)
+        valid[rows] = False
+    else:
+        valid = ~np.any([invalid[name] for name in COLUMNS], axis=0)
+    return SectionBatch(columns)[np.nonzero(valid)[0]], error_table(columns, rows, fields, messages)
+
+
+def error_table(columns, rows, fields, messages):
+    return pd.DataFrame(
+        {"row": rows, "orma_way_id": columns["orma_way_id"][rows], "field": fields, "error": messages},
+        columns=ERROR_COLUMNS,
+    )
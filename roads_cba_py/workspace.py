@@ -0,0 +1,82 @@
+import threading
+
+import numpy as np
+
+
+def loop_buffers(years=20):
+    """
+    The output arrays of the loop engine over a horizon of years: name -> (shape, dtype), with alternatives and years as
+    the first two axes
+    """
+    return {
+        "iRoadWork": ((13, years), np.int16),
+        "dCondIRI": ((13, years), np.float64),
+        "dCondCON": ((13, years), np.int16),
+        "dCondSNC": ((13, years), np.float64),
+        "iCondAge": ((13, years), np.int16),
+        "iCondLanes": ((13, years), np.int16),
+        "dCondWidth": ((13, years), np.float64),
+        "dCondLength": ((13, years), np.float64),
+        "iCondSurface": ((13, years), np.int16),
+        "dCostCapitalFin": ((13, years), np.float64),
+        "dCostRepairFin": ((13, years), np.float64),
+        "dCostRecurrentFin": ((13, years), np.float64),
+        "dCostAgencyFin": ((13, years), np.float64),
+        "dCostCapitalEco": ((13, years), np.float64),
+        "dCostRepairEco": ((13, years), np.float64),
+        "dCostRecurrentEco": ((13, years), np.float64),
+        "dCostAgencyEco": ((13, years), np.float64),
+        "dCostVOC": ((13, years), np.float64),
+        "dCostTime": ((13, years), np.float64),
+        "dCostUsers": ((13, years), np.float64),
+        "dCondSpeed": ((13, years, 12), np.float64),
+        "dCondSpeedAve": ((13, years), np.float64),
+        "dCostTotal": ((13, years), np.float64),
+        "dNetTotal": ((13, years), np.float64),
+        "dSolNPV": ((13,), np.float64),
+        "dSolNPVKm": ((13,), np.float64),
+        "dSolNPVCost": ((13,), np.float64),
+        "iSolWork": ((13,), np.int16),
+        "dSolCost": ((13,), np.float64),
+        "dSolCostkm": ((13,), np.float64),
+        "iSolYear": ((13,), np.float64),
+    }
+
+
+LOOP_BUFFERS = loop_buffers()
+
+
+class Workspace(object):
+    """
+    Preallocated output arrays for evaluating the alternatives of one section. reset() zeroes them so they can be
+    reused for the next section instead of being allocated again.
+    """
+
+    def __init__(self, buffers=LOOP_BUFFERS):
+        self.arrays = {name: np.zeros(shape, dtype=dtype) for name, (shape, dtype) in buffers.items()}
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def reset(self):
+        for array in self.arrays.values():
+            array.fill(0)
+        return self
+
+
+class ThreadLocalWorkspaces(object):
+    """
+    One Workspace per thread, so that worker threads sharing a model never write into each other's arrays. The arrays
+    handed out by get() are only valid until the next call to get() on the same thread.
+    """
+
+    def __init__(self, buffers=LOOP_BUFFERS):
+        self.buffers = buffers
+        self.local = threading.local()
+
+    def get(self) -> Workspace:
+        workspace = getattr(self.local, "workspace", None)
+        if workspace is None:
+            workspace = self.local.workspace = Workspace(self.buffers)
+            return workspace
+        return workspace.reset()
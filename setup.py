@@ -24,4 +24,5 @@ setuptools.setup(
     packages=["roads_cba_py"],
     python_requires=">=3.6",
     install_requires=requirements,
+    entry_points={"console_scripts": ["roads-cba=roads_cba_py.cli:main"]},
 )
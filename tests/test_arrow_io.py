@@ -0,0 +1,78 @@
+import glob
+import json
+import os
+import shutil
+import tempfile
+import unittest
+import warnings
+from os.path import join, dirname
+from unittest import mock
+
+import numpy as np
+from schematics.deprecated import SchematicsDeprecationWarning
+
+from roads_cba_py import arrow_io
+from roads_cba_py.cba import CostBenefitAnalysisModel
+from roads_cba_py.cba_result import CbaResultBatch
+from roads_cba_py.section import Section
+from roads_cba_py.section_batch import SectionBatch
+
+
+class TestArrowIO(unittest.TestCase):
+    EXAMPLE_DATA_DIR = join(dirname(__file__), "example_data")
+
+    def setUp(self):
+        warnings.filterwarnings("ignore", category=SchematicsDeprecationWarning)
+        files = [f for f in glob.glob(os.path.join(self.EXAMPLE_DATA_DIR, "section_*.json")) if "output" not in f]
+        self.sections = [Section.from_file(f) for f in files[0:50]]
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    @unittest.skipUnless(arrow_io.AVAILABLE, "pyarrow is not installed")
+    def test_sections(self):
+        batch = SectionBatch.from_sections(self.sections)
+        batch["lanes"][3] = np.nan
+        path = join(self.directory, "sections.parquet")
+        arrow_io.write_sections(batch, path, row_group_size=16)
+
+        self.assertEqual(
+            [json.dumps(s.to_primitive()) for s in batch],
+            [json.dumps(s.to_primitive()) for s in arrow_io.read_sections(path)],
+        )
+        self.assertIsNone(arrow_io.read_sections(path)[3].lanes)
+        projected = arrow_io.read_sections(path, columns=["orma_way_id", "length"])
+        self.assertEqual([s.length for s in self.sections], projected["length"].tolist())
+        self.assertEqual(0, projected[0].lanes)
+
+    @unittest.skipUnless(arrow_io.AVAILABLE, "pyarrow is not installed")
+    def test_results(self):
+        model = CostBenefitAnalysisModel()
+        chunks = [model.compute_cba_for_sections(self.sections[i : i + 16]) for i in range(0, 50, 16)]
+        path = join(self.directory, "results.parquet")
+        arrow_io.write_results(iter(chunks), path)
+
+        expected = CbaResultBatch.concatenate(chunks)
+        actual = arrow_io.read_results(path)
+        for name, column in expected.columns.items():
+            self.assertEqual(column.dtype, actual.columns[name].dtype, name)
+            self.assertEqual(column.shape, actual.columns[name].shape, name)
+        self.assertEqual(
+            [json.dumps(r.to_primitive()) for r in expected], [json.dumps(r.to_primitive()) for r in actual]
+        )
+
+        # A row group per chunk, projections stored as fixed size lists and only read when asked for
+        self.assertEqual(4, arrow_io.pq.ParquetFile(path).metadata.num_row_groups)
+        self.assertEqual(20, arrow_io.pq.ParquetFile(path).schema_arrow.field("aadt").type.list_size)
+        projected = arrow_io.read_results(path, columns=["npv", "work_year"])
+        self.assertEqual(["orma_way_id", "npv", "work_year"], list(projected.columns))
+        np.testing.assert_array_equal(expected.columns["npv"], projected.columns["npv"])
+
+        batches = list(arrow_io.iter_results(path, columns=["npv"], batch_size=20))
+        self.assertEqual([20, 20, 10], [len(b) for b in batches])
+        np.testing.assert_array_equal(expected.columns["npv"], np.concatenate([b.columns["npv"] for b in batches]))
+
+    def test_without_pyarrow(self):
+        with mock.patch.object(arrow_io, "AVAILABLE", False):
+            self.assertRaises(ImportError, arrow_io.read_results, join(self.directory, "results.parquet"))
@@ -0,0 +1,112 @@
+import glob
+import io
+import json
+import os
+import unittest
+import warnings
+from os.path import join, dirname
+from unittest import mock
+
+from schematics.deprecated import SchematicsDeprecationWarning
+
+from roads_cba_py import cli
+from roads_cba_py.cba import CostBenefitAnalysisModel
+from roads_cba_py.section import Section
+
+
+class TestCli(unittest.TestCase):
+    EXAMPLE_DATA_DIR = join(dirname(__file__), "example_data")
+
+    def setUp(self):
+        warnings.filterwarnings("ignore", category=SchematicsDeprecationWarning)
+        files = [f for f in glob.glob(os.path.join(self.EXAMPLE_DATA_DIR, "section_*.json")) if "output" not in f]
+        self.sections = [Section.from_file(f) for f in files[0:20]]
+
+    def run_cli(self, lines, *args):
+        stdin, stdout, stderr = io.StringIO("\n".join(lines) + "\n"), io.StringIO(), io.StringIO()
+        with mock.patch("sys.stdin", stdin), mock.patch("sys.stdout", stdout), mock.patch("sys.stderr", stderr):
+            code = cli.main(list(args))
+        return code, stdout.getvalue().splitlines(), stderr.getvalue().splitlines()
+
+    @staticmethod
+    def loads(line):
+        # Strict JSON, without the NaN json accepts
+        def reject(constant):
+            raise ValueError(f"{constant} is not JSON")
+
+        return json.loads(line, parse_constant=reject)
+
+    @staticmethod
+    def expected(model, section):
+        return json.dumps(
+            {k: cli.json_value(v) for k, v in model.compute_cba_for_section(section).to_primitive().items()}
+        )
+
+    def test_main(self):
+        lines = [json.dumps(s.to_primitive()) for s in self.sections]
+        lines[3:3] = ["not json", "", json.dumps({"orma_way_id": "a", "aadt_delivery": "17;", "length": 1})]
+        lines.append(json.dumps({"orma_way_id": "b", "length": 1, "surface_type": 1, "roughness": 3}))
+
+        code, results, errors = self.run_cli(lines, "--chunk-size", "8")
+        errors = [json.loads(e) for e in errors]
+        self.assertEqual(0, code)
+        model = CostBenefitAnalysisModel()
+        self.assertEqual(
+            [self.expected(model, s) for s in self.sections],
+            [json.dumps(self.loads(r)) for r in results],
+        )
+        self.assertEqual([4, 6, 24], [e["line"] for e in errors])
+        self.assertEqual([None, "a", "b"], [e["orma_way_id"] for e in errors])
+        self.assertEqual(["Invalid characters in 'aadt_delivery', expected float"], errors[1]["errors"])
+        self.assertEqual(
+            [
+                "Must define either road width or number of lanes",
+                "Must define either aadt_total or traffic_level",
+                "No terrain data",
+            ],
+            errors[2]["errors"],
+        )
+
+        code, results, _ = self.run_cli(lines[0:2], "--fields", "npv,eirr")
+        self.assertEqual(["orma_way_id", "npv", "eirr"], list(json.loads(results[0]).keys()))
+        self.assertEqual(2, self.run_cli([], "--fields", "unknown")[0])
+
+        for size in ["0", "-3", "many"]:
+            with self.assertRaises(SystemExit) as exit:
+                self.run_cli(lines, "--chunk-size", size)
+            self.assertEqual(2, exit.exception.code)
+
+    def test_invalid_rows(self):
+        lines = [json.dumps(s.to_primitive()) for s in self.sections[0:8]]
+        lines[2] = json.dumps(dict(self.sections[2].to_primitive(), lanes=9))
+        lines[4] = json.dumps(dict(self.sections[4].to_primitive(), terrain=0))
+        lines[5] = json.dumps(dict(self.sections[5].to_primitive(), terrain=4))
+        lines.append(json.dumps(dict(self.sections[0].to_primitive(), length=None)))
+
+        code, results, errors = self.run_cli(lines, "--chunk-size", "8")
+        errors = [json.loads(e) for e in errors]
+        self.assertEqual(0, code)
+        self.assertEqual([3, 5, 6, 9], [e["line"] for e in errors])
+        self.assertEqual(["No terrain data"], errors[1]["errors"])
+        self.assertEqual(["Value out of the range of the model tables"], errors[2]["errors"])
+        self.assertEqual(["Invalid characters in 'length', expected float"], errors[3]["errors"])
+
+        model = CostBenefitAnalysisModel()
+        expected = [self.expected(model, self.sections[i]) for i in [0, 1, 3, 6, 7]]
+        self.assertEqual(expected, [json.dumps(self.loads(r)) for r in results])
+
+        # A section the model fails on only takes itself to the errors, not the rest of its chunk
+        compute = CostBenefitAnalysisModel.compute_cba_for_batch
+        failing = self.sections[6].orma_way_id
+
+        def compute_cba_for_batch(model, batch, **kwargs):
+            if failing in batch["orma_way_id"]:
+                raise IndexError("index 9 is out of bounds")
+            return compute(model, batch, **kwargs)
+
+        with mock.patch.object(CostBenefitAnalysisModel, "compute_cba_for_batch", compute_cba_for_batch):
+            code, results, errors = self.run_cli(lines, "--chunk-size", "8")
+        errors = [json.loads(e) for e in errors]
+        self.assertEqual([3, 5, 6, 7, 9], [e["line"] for e in errors])
+        self.assertEqual(["Computation failed: index 9 is out of bounds"], errors[3]["errors"])
+        self.assertEqual(expected[0:3] + expected[4:], [json.dumps(self.loads(r)) for r in results])
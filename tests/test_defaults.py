@@ -2,9 +2,17 @@ import time
 import unittest
 
 import numpy as np
-from intervaltree import IntervalTree
 
-from roads_cba_py.defaults import traffic_ranges, traffic_ranges_data, default_range, dTrafficLevels, TrafficLevelRow
+from roads_cba_py.defaults import (
+    traffic_ranges,
+    traffic_ranges_data,
+    default_range,
+    dTrafficLevels,
+    TrafficLevelRow,
+    cc_from_iri_lu,
+    alternatives,
+    work_catalogue,
+)
 
 
 class TestDefaults(unittest.TestCase):
@@ -19,6 +27,44 @@ class TestDefaults(unittest.TestCase):
         self.assertEqual("first bucket", lu(1.49))
         self.assertEqual("second bucket", lu(1.5))
 
+        # Whole arrays are looked up at once
+        self.assertEqual(values, lu(np.arange(1, 5)).tolist())
+        self.assertEqual([["first bucket"], ["last bucket"]], lu(np.array([[0.5], [9.99]])).tolist())
+
+        # Values outside of all buckets are errors
+        self.assertRaises(ValueError, lu, 0.4)
+        self.assertRaises(ValueError, lu, 10)
+        self.assertRaises(ValueError, lu, np.array([1.0, 10.0]))
+        self.assertRaises(ValueError, lu, float("nan"))
+
+    def test_condition_class_lookups(self):
+        self.assertEqual(3, cc_from_iri_lu[3](7.0))
+        self.assertEqual(4, cc_from_iri_lu[3](9.5))
+
+        surface_types = np.array([1, 2, 3, 4, 5, 6, 7])
+        expected = [cc_from_iri_lu[s](9.0) for s in surface_types]
+        self.assertEqual(expected, cc_from_iri_lu(surface_types, 9.0).tolist())
+        self.assertEqual([[1, 5], [1, 5]], cc_from_iri_lu(np.array([[3], [4]]), np.array([0.0, 25.0])).tolist())
+
+        self.assertRaises(ValueError, cc_from_iri_lu, surface_types, 500.0)
+        self.assertRaises(ValueError, cc_from_iri_lu, np.array([1, 8]), 2.0)
+        self.assertRaises(ValueError, cc_from_iri_lu, 1, -1.0)
+
+    def test_work_catalogue(self):
+        self.assertEqual(len(alternatives), len(work_catalogue))
+        for i, alt in enumerate(alternatives):
+            self.assertEqual([alt.get_unit_cost(t) for t in (1, 2, 3)], work_catalogue.unit_costs[i].tolist())
+            self.assertEqual(alt.iri, work_catalogue["iri"][i])
+            self.assertEqual(alt.snc or 0, work_catalogue["snc"][i])
+            self.assertEqual(alt.repair, work_catalogue["repair"][i])
+
+        # Work numbers start at 1, 0 means no work
+        self.assertEqual(
+            ["", alternatives[0].code, alternatives[-1].name],
+            [work_catalogue.decode("code", 0), work_catalogue.decode("code", 1), work_catalogue.decode("name", 25)],
+        )
+        self.assertEqual(["", "Periodic"], work_catalogue.decode("work_class", np.array([0, 3])).tolist())
+
     # def test_extract_for_webapp(self):
 
     #     for e, i in enumerate(dTrafficLevels):
@@ -0,0 +1,74 @@
+import glob
+import json
+import os
+import unittest
+import warnings
+from os.path import join, dirname
+
+import numpy as np
+import schematics
+
+import roads_cba_py.cba as cba
+from roads_cba_py import deterioration
+from roads_cba_py.section import Section
+
+
+class TestDeterioration(unittest.TestCase):
+    EXAMPLE_DATA_DIR = join(dirname(__file__), "example_data")
+
+    def setUp(self) -> None:
+        warnings.filterwarnings("ignore", category=schematics.deprecated.SchematicsDeprecationWarning)
+
+    def test_closed_form_roughness(self):
+        is_reset = np.zeros((3, 20), dtype=bool)
+        is_reset[1, 5] = is_reset[1, 13] = True
+        is_reset[2, 0] = True
+        reset_roughness = np.where(is_reset, 2.5, np.nan)
+        roughness = np.array([7.0, 20.0, 9.0])
+        rates = np.array([[0.04], [0.1], [0.0]]) * np.ones((3, 20))
+        caps = np.array([[16.0], [25.0], [16.0]]) * np.ones((3, 20))
+
+        actual = deterioration.closed_form_roughness(roughness, is_reset, reset_roughness, rates, caps)
+
+        # Same as stepping the recurrence year by year, bit for bit
+        for row in range(3):
+            expected, dYearRoughness = [], roughness[row]
+            for iy in range(20):
+                if iy > 0:
+                    dYearRoughness = min(caps[row, iy], dYearRoughness * (1 + rates[row, iy]))
+                if is_reset[row, iy]:
+                    dYearRoughness = reset_roughness[row, iy]
+                expected.append(dYearRoughness)
+            self.assertEqual(expected, actual[row].tolist())
+
+        self.assertEqual(20.0, actual[1, 0])
+        self.assertEqual(2.5, actual[2, 0])
+
+    def test_constant_rates(self):
+        model = cba.CostBenefitAnalysisModel()
+        surfaces = np.array([1, 2, 3, 4, 5, 6, 7])
+        rates = deterioration.constant_rates(surfaces, model.dRoadDet, 0.025)
+        self.assertEqual([0.02, 0.025, 0.025, 0.1, 0.1, 0.05, 0.05], rates.tolist())
+
+        hdm4 = model.dRoadDet.copy()
+        hdm4[1:3, 0] = 2
+        rates = deterioration.constant_rates(surfaces, hdm4, 0.025)
+        self.assertEqual([False, True, True, False, False, False, False], np.isnan(rates).tolist())
+
+    def test_hdm4_fallback(self):
+        # With the HDM-4 equation switched on for bituminous surfaces, the batched engine falls back to the
+        # recurrence for those sections and must still match the loop engine
+        loop_model, batch_model = cba.CostBenefitAnalysisModel(), cba.CostBenefitAnalysisModel()
+        for model in (loop_model, batch_model):
+            model.dRoadDet = model.dRoadDet.copy()
+            model.dRoadDet[1:3, 0] = 2
+
+        files = [f for f in glob.glob(os.path.join(self.EXAMPLE_DATA_DIR, "section_*.json")) if "output" not in f]
+        sections = [Section.from_file(f) for f in files[0:50]]
+        for section in sections:
+            section.structural_no = 2.5
+
+        results = batch_model.compute_cba_for_sections([Section(s.to_primitive()) for s in sections])
+        for section, actual in zip(sections, results):
+            expected = loop_model.compute_cba_for_section(section)
+            self.assertEqual(json.dumps(expected.to_primitive()), json.dumps(actual.to_primitive()))
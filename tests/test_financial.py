@@ -0,0 +1,42 @@
+import unittest
+
+import numpy as np
+import numpy_financial
+
+from roads_cba_py.financial import irr
+
+
+class TestFinancial(unittest.TestCase):
+    def assertSameRates(self, expected, actual):
+        self.assertEqual(np.isnan(expected).tolist(), np.isnan(actual).tolist())
+        np.testing.assert_allclose(actual[~np.isnan(actual)], expected[~np.isnan(expected)], rtol=1e-9, atol=1e-12)
+
+    def test_irr(self):
+        self.assertAlmostEqual(0.28094842115996, irr([-100, 39, 59, 55, 20]), places=12)
+        self.assertAlmostEqual(-0.0955, irr([-100, 0, 0, 74]), places=4)
+        self.assertAlmostEqual(-0.0833, irr([-100, 100, 0, -7]), places=4)
+
+        # All of the same sign or all zero
+        self.assertTrue(np.isnan(irr([100, 39, 59])))
+        self.assertTrue(np.isnan(irr([-100, -39, -59])))
+        self.assertTrue(np.isnan(irr(np.zeros(20))))
+        self.assertTrue(np.isnan(irr([0, 5, 5])))
+
+        # A trailing zero is a root at -100%
+        self.assertEqual(-1.0, irr([-5, -3, 0]))
+
+        # Rows are solved together
+        flows = np.array([[[-100, 39, 59, 55, 20], [100, 39, 59, 55, 20]]])
+        self.assertEqual((1, 2), irr(flows).shape)
+
+    def test_matches_numpy_financial(self):
+        # Several sign changes, so several real rates to choose from, and rows of zeros or of a single sign
+        rng = np.random.default_rng(42)
+        flows = rng.normal(size=(2000, 20)) * (rng.random((2000, 20)) < 0.6)
+        flows[:200] = np.abs(flows[:200])
+        flows[200:300] = 0
+        flows[300:400, -3:] = 0
+        flows[400:600, :10] = -np.abs(flows[400:600, :10])
+        flows[400:600, 10:] = np.abs(flows[400:600, 10:])
+
+        self.assertSameRates(numpy_financial.irr(flows), irr(flows))
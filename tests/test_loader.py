@@ -0,0 +1,65 @@
+import glob
+import json
+import shutil
+import tempfile
+import unittest
+import warnings
+from os.path import join, dirname
+from unittest import mock
+
+from schematics.deprecated import SchematicsDeprecationWarning
+
+from roads_cba_py import loader
+from roads_cba_py.cba_result import CbaResult
+from roads_cba_py.section import Section
+
+
+class TestLoader(unittest.TestCase):
+    EXAMPLE_DATA_DIR = join(dirname(__file__), "example_data")
+
+    def setUp(self):
+        warnings.filterwarnings("ignore", category=SchematicsDeprecationWarning)
+
+    def test_load_sections(self):
+        files = loader.section_files(self.EXAMPLE_DATA_DIR)
+        self.assertEqual(
+            sorted(f for f in glob.glob(join(self.EXAMPLE_DATA_DIR, "section_*.json")) if "output" not in f), files
+        )
+        self.assertEqual(
+            [f for f in files if "section_60" in f],
+            loader.section_files(join(self.EXAMPLE_DATA_DIR, "section_60*.json")),
+        )
+
+        batch = loader.load_sections(self.EXAMPLE_DATA_DIR, max_workers=4)
+        self.assertEqual(len(files), len(batch))
+        for f, section in zip(files[0:100], batch[0:100]):
+            self.assertEqual(Section.from_file(f).to_primitive(), section.to_primitive())
+
+    def test_load_examples(self):
+        sections, results = loader.load_examples(join(self.EXAMPLE_DATA_DIR, "section_61*.json"))
+        self.assertEqual(len(sections), len(results))
+        for section, result in zip(sections, results):
+            expected = CbaResult.from_file(join(self.EXAMPLE_DATA_DIR, f"section_{section.orma_way_id}.output.json"))
+            self.assertEqual(json.dumps(expected.to_primitive()), json.dumps(result.to_primitive()))
+
+        # Results are matched to their section by identifier
+        directory = tempfile.mkdtemp()
+        try:
+            ident = loader.identifier(loader.section_files(self.EXAMPLE_DATA_DIR)[0])
+            self.assertRaises(ValueError, loader.load_examples, directory)
+            shutil.copy(join(self.EXAMPLE_DATA_DIR, f"section_{ident}.json"), join(directory, "section_other.json"))
+            shutil.copy(
+                join(self.EXAMPLE_DATA_DIR, f"section_{ident}.output.json"),
+                join(directory, "section_other.output.json"),
+            )
+            self.assertRaises(ValueError, loader.load_examples, directory)
+        finally:
+            shutil.rmtree(directory)
+
+    def test_loads(self):
+        # A faster parser that can't parse the NaN of a missing EIRR falls back to json
+        parser = mock.Mock(loads=mock.Mock(side_effect=ValueError))
+        with mock.patch.object(loader, "orjson", parser):
+            self.assertTrue(loader.loads(b'{"eirr": NaN}')["eirr"] != 0)
+            self.assertEqual({"npv": 1.0}, loader.loads(b'{"npv": 1.0}'))
+        parser.loads.assert_called()
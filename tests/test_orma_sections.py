@@ -0,0 +1,51 @@
+import glob
+import os
+import unittest
+import warnings
+from os.path import join, dirname
+
+import pandas as pd
+from schematics.deprecated import SchematicsDeprecationWarning
+
+from roads_cba_py.orma_sections import ORMA_COLUMNS, parse_orma, maybe_number
+from roads_cba_py.section import Section
+
+
+class TestOrmaSections(unittest.TestCase):
+    EXAMPLE_DATA_DIR = join(dirname(__file__), "example_data")
+
+    def setUp(self):
+        warnings.filterwarnings("ignore", category=SchematicsDeprecationWarning)
+        files = [f for f in glob.glob(os.path.join(self.EXAMPLE_DATA_DIR, "section_*.json")) if "output" not in f]
+        sections = [Section.from_file(f).to_primitive() for f in files[0:50]]
+        self.rows = [{column: s[name] for name, (column, _) in ORMA_COLUMNS.items()} for s in sections]
+
+    def test_maybe_number(self):
+        values = ["", None, 0, "12", 2.7, "x"]
+        self.assertEqual([0, 0, 0, 12, 2, "x"], maybe_number(pd.Series(values, dtype=object), True).tolist())
+        self.assertEqual([0, 0, 0, 12.0, 2.7, "x"], maybe_number(pd.Series(values, dtype=object), False).tolist())
+        self.assertEqual([0.0, 2.0], maybe_number(pd.Series([None, 2.7]), True).tolist())
+
+    def test_parse_orma(self):
+        self.rows[1].update({"width": "6+", "section_lanes": ""})
+        self.rows[2].update({"iri": "", "section_motorcycle": "12"})
+        self.rows[3].update({"section_lanes": "2.5"})
+        df = pd.DataFrame(self.rows)
+
+        batch, errors = parse_orma(df)
+        self.assertEqual(49, len(batch))
+        self.assertEqual(
+            [["lanes", "Invalid characters in 'lanes', expected float"]],
+            errors[errors["row"] == 3][["field", "error"]].values.tolist(),
+        )
+
+        # The same sections as Section.from_row gives for the valid rows
+        expected = [Section.from_row(row) for i, row in df.iterrows() if i != 3]
+        self.assertEqual([s.to_primitive() for s in expected], [s.to_primitive() for s in batch])
+        self.assertEqual(6.0, batch[1].width)
+        self.assertEqual(12, batch[2].aadt_motorcyle)
+
+        # Unlike in Section.from_row, missing values in float columns are 0 as well
+        df["iri"] = None
+        batch, errors = parse_orma(df)
+        self.assertEqual([0.0] * 49, batch["roughness"].tolist())
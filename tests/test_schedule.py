@@ -0,0 +1,89 @@
+import unittest
+
+import numpy as np
+
+from roads_cba_py.defaults import dWorkEvaluated, work_catalogue
+from roads_cba_py.schedule import AlternativeSchedules, applicable_works
+
+
+class TestSchedule(unittest.TestCase):
+    def test_alternative_schedules(self):
+        schedules = AlternativeSchedules(dWorkEvaluated, work_catalogue)
+        self.assertEqual(350, len(schedules))
+
+        for row, (work_year, road_work_number, alt_1, alt_2, unit_cost_mult) in enumerate(dWorkEvaluated):
+            count = 13 if alt_2 > 0 else 7 if alt_1 > 0 else 2
+            self.assertEqual(count, schedules.count[row])
+            self.assertEqual(unit_cost_mult, schedules.cost_factor[row])
+            self.assertEqual((road_work_number, work_year), tuple(schedules.alternatives[row, 0]))
+            if alt_1 > 0:
+                self.assertEqual([alt_1] * 6, schedules.alternatives[row, 1:7, 0].tolist())
+                self.assertEqual([1, 2, 3, 4, 5, 6], schedules.alternatives[row, 1:7, 1].tolist())
+
+            # Work in its year, repairs every repair period after it within the 20 years
+            for ia in range(count):
+                work_no, year = schedules.work[row, ia], schedules.work_year[row, ia]
+                period = work_catalogue["repair_period"][work_no - 1]
+                repair_years = [y for y in range(year + period, min(year + 4 * period, 20) + 1, period)]
+                self.assertEqual([year], (np.nonzero(schedules.is_work[row, ia])[0] + 1).tolist())
+                self.assertEqual(repair_years, (np.nonzero(schedules.is_repair[row, ia])[0] + 1).tolist())
+                self.assertEqual(work_catalogue["repair"][work_no - 1], schedules.repair[row, ia])
+
+    def test_long_horizon(self):
+        # Over 40 years the repairs go on past the 4 that fit in 20 years
+        schedules = AlternativeSchedules(dWorkEvaluated, work_catalogue, years=40)
+        for row in range(0, len(schedules), 7):
+            for ia in range(schedules.count[row]):
+                work_no, year = schedules.work[row, ia], schedules.work_year[row, ia]
+                period = work_catalogue["repair_period"][work_no - 1]
+                repair_years = list(range(year + period, 41, period))
+                self.assertEqual(repair_years, (np.nonzero(schedules.is_repair[row, ia])[0] + 1).tolist())
+
+    def test_shared_trajectories(self):
+        schedules = AlternativeSchedules(dWorkEvaluated, work_catalogue)
+        events = schedules.is_work | schedules.is_repair
+
+        for row in range(len(schedules)):
+            for ia in range(1, 13):
+                # No work in either alternative before the shared prefix
+                prefix = schedules.shared_prefix[row, ia]
+                self.assertFalse(events[row, [0, ia], :prefix].any())
+
+                # The source does the same work and repairs, shift years earlier
+                source, shift = schedules.shift_source[row, ia], schedules.shift[row, ia]
+                if source >= 0:
+                    self.assertLess(source, ia)
+                    self.assertEqual(schedules.work[row, source], schedules.work[row, ia])
+                    np.testing.assert_array_equal(events[row, source, : 20 - shift], events[row, ia, shift:])
+                    self.assertEqual(prefix, schedules.work_year[row, ia] - 1)
+
+        # Delayed alternatives follow the first alternative with the same work
+        row = np.nonzero(schedules.count == 13)[0][0]
+        self.assertEqual([-1, -1, 1, 1, 1, 1, 1, -1, 7, 7, 7, 7, 7], schedules.shift_source[row].tolist())
+        self.assertEqual([0, 0, 1, 2, 3, 4, 5, 0, 1, 2, 3, 4, 5], schedules.shift[row].tolist())
+
+    def test_extended_schedules(self):
+        applicable = applicable_works(dWorkEvaluated, work_catalogue)
+        self.assertEqual(7, len(applicable))
+        # Concrete can't be upgraded, bituminous roads only to concrete, earth roads to any other surface
+        self.assertEqual([1, 2], applicable[0].tolist())
+        self.assertEqual([3, 4, 5, 6, 7, 8, 9, 10, 11, 25], applicable[2].tolist())
+        self.assertEqual([14, 15, 20, 21, 22, 23, 24, 25], applicable[4].tolist())
+        self.assertEqual(
+            [3, 4, 5, 6, 7, 8, 9, 10, 11], applicable_works(dWorkEvaluated, work_catalogue, False)[2].tolist()
+        )
+
+        standard = AlternativeSchedules(dWorkEvaluated, work_catalogue)
+        schedules = AlternativeSchedules.extended(dWorkEvaluated, work_catalogue, work_years=[2, 4])
+        for row in range(len(schedules)):
+            works = applicable[row // 50]
+            self.assertEqual(1 + 2 * len(works), schedules.count[row])
+            np.testing.assert_array_equal(standard.alternatives[row, 0], schedules.alternatives[row, 0])
+            alternatives = schedules.alternatives[row, 1 : schedules.count[row]].tolist()
+            self.assertEqual([[w, y] for w in works for y in [2, 4]], alternatives)
+
+        self.assertRaises(ValueError, AlternativeSchedules.extended, dWorkEvaluated, work_catalogue, 20, [0, 1])
+        # A work past the horizon would be a "do nothing" alternative
+        self.assertRaises(ValueError, AlternativeSchedules.extended, dWorkEvaluated, work_catalogue, 20, [1, 25])
+        self.assertRaises(ValueError, AlternativeSchedules.extended, dWorkEvaluated, work_catalogue, 5, range(1, 7))
+        AlternativeSchedules.extended(dWorkEvaluated, work_catalogue, 20, [1, 20])
@@ -10,7 +10,7 @@ import os
 from schematics.exceptions import DataError
 
 sys.path.append(".")
-from roads_cba_py.section import Section, parse_section
+from roads_cba_py.section import Section, TrustedSection, parse_section
 
 
 class TestSection(unittest.TestCase):
@@ -40,6 +40,20 @@ class TestSection(unittest.TestCase):
             s.invalid_reason(),
         )
 
+    def test_trusted(self):
+        s = TestSection.load_from_file("section_635950_304.json")
+        trusted = TrustedSection(s.to_primitive())
+        self.assertEqual(s.to_primitive(), trusted.to_primitive())
+        self.assertEqual(s.get_aadts(), trusted.get_aadts())
+        self.assertEqual(s.to_primitive(), trusted.to_section().to_primitive())
+
+        # Values are taken as they are, absent ones take the Section defaults
+        trusted = TrustedSection({"orma_way_id": "7", "aadt_delivery": "17;"})
+        self.assertEqual("17;", trusted.aadt_delivery)
+        self.assertEqual(0, trusted.lanes)
+        self.assertIsNone(trusted.length)
+        self.assertRaises(AttributeError, setattr, trusted, "unknown", 1)
+
     def test_split(self):
         a = [1, 2, 3, 4, 5]
         evens, odds = split_on_condition(a, lambda x: x % 2 == 0)
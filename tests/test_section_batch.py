@@ -0,0 +1,63 @@
+import glob
+import json
+import os
+import unittest
+import warnings
+from os.path import join, dirname
+
+import numpy as np
+from schematics.deprecated import SchematicsDeprecationWarning
+
+from roads_cba_py.section import Section
+from roads_cba_py.section_batch import SectionBatch
+
+
+class TestSectionBatch(unittest.TestCase):
+    EXAMPLE_DATA_DIR = join(dirname(__file__), "example_data")
+
+    def setUp(self):
+        warnings.filterwarnings("ignore", category=SchematicsDeprecationWarning)
+        files = [f for f in glob.glob(os.path.join(self.EXAMPLE_DATA_DIR, "section_*.json")) if "output" not in f]
+        self.sections = [Section.from_file(f) for f in files[0:100]]
+
+    def assertSameSections(self, expected, actual):
+        self.assertEqual(
+            [json.dumps(s.to_primitive()) for s in expected], [json.dumps(s.to_primitive()) for s in actual]
+        )
+
+    def test_sections(self):
+        batch = SectionBatch.from_sections(self.sections)
+        self.assertEqual(100, len(batch))
+        self.assertEqual(set(Section.fields), set(batch.columns))
+        self.assertEqual(self.sections[3].orma_way_id, batch["orma_way_id"][3])
+        self.assertEqual((100, 12), batch.get_aadts().shape)
+
+        self.assertSameSections(self.sections, batch.to_sections())
+        self.assertSameSections(self.sections[10:20], batch[10:20])
+        self.assertSameSections([self.sections[7]], [batch[7]])
+        self.assertSameSections(self.sections + self.sections[:5], SectionBatch.concatenate([batch, batch[:5]]))
+        self.assertSameSections(self.sections, batch.to_sections(trusted=True))
+
+    def test_dataframe(self):
+        batch = SectionBatch.from_sections(self.sections)
+        df = batch.to_dataframe()
+        self.assertEqual(100, len(df))
+        self.assertSameSections(self.sections, SectionBatch.from_dataframe(df))
+
+        # Unknown columns are ignored, absent ones take the Section defaults
+        df = df[["orma_way_id", "length", "lanes"]].assign(unknown=1)
+        self.assertSameSections(
+            [Section({"orma_way_id": s.orma_way_id, "length": s.length, "lanes": s.lanes}) for s in self.sections],
+            SectionBatch.from_dataframe(df),
+        )
+
+    def test_records(self):
+        batch = SectionBatch.from_records([{"orma_way_id": "a", "length": "2.5", "lanes": None}, {"orma_way_id": "b"}])
+        np.testing.assert_array_equal([2.5, np.nan], batch["length"])
+
+        # As for Section, None is kept as missing while absent values take the default
+        self.assertIsNone(batch[0].lanes)
+        self.assertEqual(0, batch[1].lanes)
+        self.assertSameSections([Section({"orma_way_id": "b"})], batch[1:])
+
+        self.assertRaises(ValueError, SectionBatch, {"orma_way_id": ["a", "b"], "length": [1.0]})
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from roads_cba_py.defaults import dGrowth, dVehicleFleet, dWidthDefaults
+from roads_cba_py.traffic import TrafficTables
+
+
+class TestTraffic(unittest.TestCase):
+    def setUp(self) -> None:
+        self.traffic = TrafficTables(dGrowth, dVehicleFleet, dWidthDefaults)
+
+    def test_tables(self):
+        self.assertEqual((5, 12, 20), self.traffic.growth.shape)
+        self.assertEqual((12, 1), self.traffic.esa_weights.shape)
+        self.assertEqual((7,), self.traffic.annualisation.shape)
+        np.testing.assert_array_equal(1.0, self.traffic.growth[:, :, 0])
+        np.testing.assert_allclose(1.034, self.traffic.growth[0, :, 1:])
+
+    def test_project(self):
+        rng = np.random.default_rng(7)
+        base = rng.integers(0, 500, size=(30, 12)).astype(np.float64)
+        scenarios = rng.integers(1, 6, size=30)
+        lanes = rng.integers(1, 8, size=30)
+
+        dAADT = self.traffic.project(base, scenarios)
+        self.assertEqual((30, 13, 20), dAADT.shape)
+
+        for i in range(30):
+            # Year by year growth as in the reference spreadsheet, the same to the last bit
+            expected = np.zeros((13, 20))
+            expected[0:12, 0] = base[i]
+            for y in range(1, 20):
+                expected[0:12, y] = expected[0:12, y - 1] * (1 + dGrowth[scenarios[i] - 1])
+            expected[12] = expected[0:12].sum(axis=0)
+            np.testing.assert_array_equal(expected, dAADT[i])
+
+            annualisation_factor = 365 / 1000000 / dWidthDefaults[lanes[i] - 1, 1]
+            esa = np.sum(expected[0:12] * dVehicleFleet[0:12, 0:1], axis=0) * annualisation_factor
+            np.testing.assert_array_equal(esa, self.traffic.esa_loading(dAADT[i], lanes[i]))
+
+        # A single section projects the same as the batch
+        np.testing.assert_array_equal(dAADT[3], self.traffic.project(base[3], scenarios[3]))
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from roads_cba_py.defaults import dVOC, dSPEED, dVehicleFleet
+from roads_cba_py.user_costs import user_costs
+
+
+class TestUserCosts(unittest.TestCase):
+    def test_user_costs(self):
+        rng = np.random.default_rng(0)
+        iri = rng.uniform(1.0, 25.0, size=(3, 13, 20))
+        lanes = rng.integers(1, 8, size=(3, 13, 20))
+        terrain = np.array([1, 2, 3])[:, np.newaxis, np.newaxis]
+        aadt = rng.uniform(0.0, 500.0, size=(3, 1, 20, 12))
+        length = np.array([0.5, 2.0, 10.0])[:, np.newaxis, np.newaxis]
+
+        voc, speed, speed_ave, time = user_costs(iri, lanes, terrain, aadt, length, dVOC, dSPEED, dVehicleFleet)
+        self.assertEqual((3, 13, 20, 12), speed.shape)
+
+        # One cell at a time as the original year by year loop computes it, the same to the last bit
+        for s, a, y in [(0, 0, 0), (1, 5, 7), (2, 12, 19)]:
+            l, t, r = lanes[s, a, y] - 1, terrain[s, 0, 0] - 1, iri[s, a, y]
+            iri2, iri3 = np.power(r, 2), np.power(r, 3)
+            cell_speed = dSPEED[l, t, 0] + (dSPEED[l, t, 1] * r) + (dSPEED[l, t, 2] * iri2) + (dSPEED[l, t, 3] * iri3)
+            cell_voc = (dVOC[l, t, 0] + (dVOC[l, t, 1] * r) + (dVOC[l, t, 2] * iri2) + (dVOC[l, t, 3] * iri3)) * aadt[
+                s, 0, y
+            ]
+            cell_time = (
+                1
+                / cell_speed
+                * length[s, 0, 0]
+                * dVehicleFleet[:, 1]
+                * dVehicleFleet[:, 2]
+                * aadt[s, 0, y]
+                * 365
+                / 1000000
+            ).sum()
+
+            np.testing.assert_array_equal(cell_speed, speed[s, a, y])
+            self.assertEqual(cell_speed.sum() / 12, speed_ave[s, a, y])
+            self.assertEqual(cell_voc.sum() * length[s, 0, 0] * 365 / 1000000, voc[s, a, y])
+            self.assertEqual(cell_time, time[s, a, y])
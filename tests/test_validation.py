@@ -0,0 +1,71 @@
+import glob
+import os
+import unittest
+import warnings
+from os.path import join, dirname
+
+import pandas as pd
+from schematics.deprecated import SchematicsDeprecationWarning
+from schematics.exceptions import DataError
+
+from roads_cba_py.section import Section, InvalidSection, parse_section
+from roads_cba_py.section_batch import SectionBatch
+from roads_cba_py.validation import validate_sections, parse_sections
+
+
+class TestValidation(unittest.TestCase):
+    EXAMPLE_DATA_DIR = join(dirname(__file__), "example_data")
+
+    def setUp(self):
+        warnings.filterwarnings("ignore", category=SchematicsDeprecationWarning)
+        files = [f for f in glob.glob(os.path.join(self.EXAMPLE_DATA_DIR, "section_*.json")) if "output" not in f]
+        self.records = [Section.from_file(f).to_primitive() for f in files[0:50]]
+
+    @staticmethod
+    def invalid_reason(record):
+        section = parse_section(record)
+        if isinstance(section, InvalidSection):
+            return section.invalid_reason()
+        try:
+            section.validate()
+            errors = []
+        except DataError as err:
+            errors = InvalidSection(err.errors, record).invalid_reason()
+        return errors + (section.invalid_reason() or [])
+
+    def test_validate_sections(self):
+        values = [None, 0, "", "17;", "12", " 3 ", "2.5", 2.5, 3.0, "x" * 30, 7, True]
+        records = [dict(r) for r in self.records]
+        fields = list(Section.fields)
+        for i, record in enumerate(records * 2):
+            record[fields[(7 * i) % len(fields)]] = values[i % len(values)]
+
+        errors = validate_sections(pd.DataFrame(records, dtype=object))
+        self.assertEqual(["row", "orma_way_id", "field", "error"], list(errors.columns))
+        for i, record in enumerate(records):
+            expected = self.invalid_reason(record)
+            self.assertEqual(expected, errors["error"][errors["row"] == i].tolist(), record)
+
+        example = dict(self.records[0], orma_way_id="a", aadt_delivery="17;")
+        self.assertEqual(
+            [[0, "a", "aadt_delivery", "Invalid characters in 'aadt_delivery', expected float"]],
+            validate_sections(pd.DataFrame([example])).values.tolist(),
+        )
+
+    def test_parse_sections(self):
+        valid = next(r for r in self.records if not self.invalid_reason(r))
+        records = self.records + [dict(valid, lanes=2.5), dict(valid, terrain=0)]
+        df = pd.DataFrame(records)
+        batch, errors = parse_sections(df)
+
+        valid = [Section(r) for r in records if not self.invalid_reason(r)]
+        self.assertEqual([s.to_primitive() for s in valid], [s.to_primitive() for s in batch])
+        self.assertEqual(validate_sections(df).values.tolist(), errors.values.tolist())
+        self.assertEqual(
+            ["Invalid characters in 'lanes', expected float", "No terrain data"],
+            errors["error"][errors["row"] >= 50].tolist(),
+        )
+
+        # Already converted sections only get the checks of Section.validate and Section.invalid_reason
+        batch = SectionBatch.from_records(records[50:])
+        self.assertEqual([["terrain", "No terrain data"]], validate_sections(batch)[["field", "error"]].values.tolist())